@@ -41,12 +41,14 @@ class Settings(BaseSettings):
     # Processing settings
     text_chunk_size: int = 500
     text_chunk_overlap: int = 50
+    text_chunk_tokenizer: Optional[str] = None  # e.g. "bert-base-uncased"; chunk by tokens when `tokenizers` is installed
     audio_chunk_duration: int = 30  # seconds for audio processing
 
     # Google API specific settings
     google_speech_language: str = "en-US"
     google_speech_model: str = "latest_long"
     google_embedding_model: str = "models/embedding-001"
+    google_embedding_batch_size: int = 100  # max chunks per embed_content request
 
     # Transcription settings
     audio_transcription_confidence_threshold: float = 0.8
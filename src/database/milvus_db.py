@@ -15,10 +15,32 @@ from src.database.config import (
     get_default_database_config, load_config_from_dict
 )
 
+# Faster JSON for the metadata field (optional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+
+def _dumps_metadata(metadata: Dict[str, Any]) -> str:
+    """Serialize metadata for the JSON string field"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(metadata, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(metadata)
+
+
+def _loads_metadata(metadata: str) -> Dict[str, Any]:
+    """Parse the JSON string metadata field"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(metadata)
+    return json.loads(metadata)
+
 class MilvusVectorDatabase:
-    def __init__(self, config: Optional[DatabaseConfig] = None, host: Optional[str] = None, port: Optional[int] = None):
+    def __init__(self, config: Optional[DatabaseConfig] = None, host: Optional[str] = None, port: Optional[int] = None,
+                 lite_uri: str = "./milvus_lite.db"):
         """
         Initialize Milvus Vector Database
         
@@ -26,6 +48,7 @@ class MilvusVectorDatabase:
             config: DatabaseConfig object with full configuration
             host: Milvus host (overrides config if provided)
             port: Milvus port (overrides config if provided)
+            lite_uri: Milvus Lite database file tried before the remote server
         """
         # Use provided config or default
         self.config = config or get_default_database_config()
@@ -38,6 +61,7 @@ class MilvusVectorDatabase:
             
         self.host = self.config.host
         self.port = self.config.port
+        self.lite_uri = lite_uri
         self.connection_name = "default"
         self.collections: Dict[str, Collection] = {}
         self.is_connected = False
@@ -64,7 +88,7 @@ class MilvusVectorDatabase:
             # Try Milvus Lite first (local embedded database)
             connections.connect(
                 alias=self.connection_name,
-                uri="./milvus_lite.db"
+                uri=self.lite_uri
             )
             self.is_connected = True
             logger.info("Connected to Milvus Lite (embedded database)")
@@ -294,6 +318,71 @@ class MilvusVectorDatabase:
             logger.error(f"Failed to insert document into {collection_name}: {e}")
             return None
     
+    def insert_documents_batch(self, collection_name: str, vectors: List[List[float]],
+                               metadatas: List[DocumentMetadata], content_hashes: List[str],
+                               file_sizes: List[int]) -> List[str]:
+        """Insert many structured documents with a single insert and flush; arguments are parallel lists"""
+        try:
+            if not vectors:
+                return []
+            
+            columns = [metadatas, content_hashes, file_sizes]
+            if any(len(column) != len(vectors) for column in columns):
+                logger.error(f"Batch insert into {collection_name} got columns of different lengths")
+                return []
+            
+            if collection_name not in self.collections:
+                if not self.create_collection(collection_name):
+                    return []
+            
+            collection = self.collections[collection_name]
+            
+            doc_ids = [str(uuid.uuid4()) for _ in vectors]
+            timestamp = int(time.time() * 1000)
+            
+            # Build each field column once for the whole batch
+            data = [
+                doc_ids,                                                                      # id field
+                vectors,                                                                      # vector field
+                [metadata.model_dump_json() for metadata in metadatas],                       # metadata field as JSON string
+                [metadata.content.content_type.value for metadata in metadatas],              # content_type field
+                [metadata.organizational.department for metadata in metadatas],               # department field
+                [metadata.organizational.role for metadata in metadatas],                     # role field
+                [metadata.organizational.organization_type.value for metadata in metadatas],  # organization_type field
+                [metadata.organizational.security_level.value for metadata in metadatas],     # security_level field
+                [timestamp] * len(vectors),                                                   # timestamp field
+                file_sizes,                                                                   # file_size field
+                content_hashes                                                                # content_hash field
+            ]
+            
+            collection.insert(data)
+            collection.flush()
+            
+            logger.info(f"Inserted {len(doc_ids)} documents into {collection_name}")
+            return doc_ids
+        
+        except Exception as e:
+            logger.error(f"Failed to batch insert documents into {collection_name}: {e}")
+            return []
+    
+    def _ensure_collection_dim(self, collection_name: str, vector_dim: int) -> bool:
+        """Create the collection, recreating it first if its vector dimension differs"""
+        # Check if collection exists in Milvus and has correct dimension
+        if utility.has_collection(collection_name):
+            existing_dim = self.get_collection_vector_dim(collection_name)
+            logger.info(f"Collection {collection_name} exists with dimension {existing_dim}")
+            if existing_dim != vector_dim:
+                logger.warning(f"Dimension mismatch: existing={existing_dim}, needed={vector_dim}. Dropping collection.")
+                if not self.drop_collection(collection_name):
+                    logger.error(f"Failed to drop collection {collection_name}")
+                    return False
+        
+        # Create or recreate collection with correct dimension
+        if not self.create_collection(collection_name, vector_dim):
+            logger.error(f"Failed to create collection {collection_name}")
+            return False
+        return True
+    
     def insert_data(self, collection_name: str, vector: List[float], metadata: Dict[str, Any], 
                    content_type: str, department: str, file_size: int, content_hash: str) -> Optional[str]:
         """Legacy insert method for backward compatibility"""
@@ -302,19 +391,7 @@ class MilvusVectorDatabase:
             vector_dim = len(vector)
             logger.info(f"Inserting vector of dimension {vector_dim} into collection {collection_name}")
             
-            # Check if collection exists in Milvus and has correct dimension
-            if utility.has_collection(collection_name):
-                existing_dim = self.get_collection_vector_dim(collection_name)
-                logger.info(f"Collection {collection_name} exists with dimension {existing_dim}")
-                if existing_dim != vector_dim:
-                    logger.warning(f"Dimension mismatch: existing={existing_dim}, needed={vector_dim}. Dropping collection.")
-                    if not self.drop_collection(collection_name):
-                        logger.error(f"Failed to drop collection {collection_name}")
-                        return None
-            
-            # Create or recreate collection with correct dimension
-            if not self.create_collection(collection_name, vector_dim):
-                logger.error(f"Failed to create collection {collection_name}")
+            if not self._ensure_collection_dim(collection_name, vector_dim):
                 return None
             
             collection = self.collections[collection_name]
@@ -332,7 +409,7 @@ class MilvusVectorDatabase:
             data = [
                 [doc_id],                    # id field
                 [vector],                    # vector field
-                [json.dumps(metadata)],      # metadata field as JSON string
+                [_dumps_metadata(metadata)], # metadata field as JSON string
                 [content_type],              # content_type field
                 [department],                # department field
                 [role],                      # role field
@@ -354,6 +431,56 @@ class MilvusVectorDatabase:
             logger.error(f"Failed to insert data into {collection_name}: {e}")
             return None
     
+    def insert_data_batch(self, collection_name: str, vectors: List[List[float]], metadatas: List[Dict[str, Any]],
+                          content_types: List[str], departments: List[str], file_sizes: List[int],
+                          content_hashes: List[str]) -> List[str]:
+        """Insert many rows with a single insert and flush; arguments are parallel lists as in insert_data"""
+        try:
+            if not vectors:
+                return []
+            
+            columns = [metadatas, content_types, departments, file_sizes, content_hashes]
+            if any(len(column) != len(vectors) for column in columns):
+                logger.error(f"Batch insert into {collection_name} got columns of different lengths")
+                return []
+            
+            vector_dim = len(vectors[0])
+            logger.info(f"Inserting {len(vectors)} vectors of dimension {vector_dim} into collection {collection_name}")
+            
+            if not self._ensure_collection_dim(collection_name, vector_dim):
+                return []
+            
+            collection = self.collections[collection_name]
+            
+            doc_ids = [str(uuid.uuid4()) for _ in vectors]
+            org_metas = [metadata.get("organizational", {}) for metadata in metadatas]
+            timestamp = int(time.time() * 1000)
+            
+            # Build each field column once for the whole batch
+            data = [
+                doc_ids,                                                             # id field
+                vectors,                                                             # vector field
+                [_dumps_metadata(metadata) for metadata in metadatas],               # metadata field as JSON string
+                content_types,                                                       # content_type field
+                departments,                                                         # department field
+                [org_meta.get("role", "unknown") for org_meta in org_metas],         # role field
+                [org_meta.get("organization_type", "healthcare") for org_meta in org_metas],  # organization_type field
+                [org_meta.get("security_level", "internal") for org_meta in org_metas],       # security_level field
+                [timestamp] * len(vectors),                                          # timestamp field
+                file_sizes,                                                          # file_size field
+                content_hashes                                                       # content_hash field
+            ]
+            
+            collection.insert(data)
+            collection.flush()
+            
+            logger.info(f"Inserted {len(doc_ids)} rows into {collection_name}")
+            return doc_ids
+            
+        except Exception as e:
+            logger.error(f"Failed to batch insert data into {collection_name}: {e}")
+            return []
+    
     def vector_search(self, collection_name: str, query_vector: List[float], 
                      limit: int = 10, metadata_filter: Optional[str] = None) -> List[Dict[str, Any]]:
         """Perform vector similarity search"""
@@ -403,7 +530,7 @@ class MilvusVectorDatabase:
                 for hit in hits:
                     metadata = hit.entity.get("metadata")
                     if isinstance(metadata, str):
-                        metadata = json.loads(metadata)
+                        metadata = _loads_metadata(metadata)
                     
                     result = {
                         "id": hit.entity.get("id"),
@@ -474,7 +601,7 @@ class MilvusVectorDatabase:
             for result in results:
                 metadata = result.get("metadata")
                 if isinstance(metadata, str):
-                    result["metadata"] = json.loads(metadata)
+                    result["metadata"] = _loads_metadata(metadata)
             
             return results
             
@@ -482,6 +609,24 @@ class MilvusVectorDatabase:
             logger.error(f"Metadata search failed in {collection_name}: {e}")
             return []
     
+    def delete_by_expr(self, collection_name: str, expr: str) -> bool:
+        """Delete all entities matching a boolean filter expression"""
+        try:
+            if collection_name not in self.collections:
+                logger.error(f"Collection {collection_name} not found")
+                return False
+            
+            collection = self.collections[collection_name]
+            collection.delete(expr)
+            collection.flush()
+            
+            logger.info(f"Deleted entities matching '{expr}' from {collection_name}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Delete failed in {collection_name}: {e}")
+            return False
+    
     def hybrid_search(self, collection_name: str, query_vector: List[float], 
                      metadata_filter: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
         """Combine vector search with metadata filtering"""
@@ -557,7 +702,7 @@ class MilvusVectorDatabase:
             for result in results:
                 metadata = result.get("metadata")
                 if isinstance(metadata, str):
-                    metadata = json.loads(metadata)
+                    metadata = _loads_metadata(metadata)
                 
                 document = {
                     "id": result.get("id"),
@@ -613,7 +758,7 @@ class MilvusVectorDatabase:
             for result in results:
                 metadata = result.get("metadata")
                 if isinstance(metadata, str):
-                    metadata = json.loads(metadata)
+                    metadata = _loads_metadata(metadata)
                 
                 doc_tags = metadata.get("tags", [])
                 if any(tag in doc_tags for tag in tags):
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 import logging
 from abc import ABC, abstractmethod
 
@@ -52,23 +52,23 @@ logger = logging.getLogger(__name__)
 class DocumentExtractor(ABC):
     """Abstract base class for document extractors"""
     
+    # MIME types and lowercase file extensions handled by this extractor
+    mime_types: Tuple[str, ...] = ()
+    extensions: Tuple[str, ...] = ()
+    
     @abstractmethod
     def extract_text(self, file_path: str) -> str:
         pass
     
-    @abstractmethod
     def can_handle(self, file_path: str, mime_type: str) -> bool:
-        pass
+        return mime_type in self.mime_types or file_path.lower().endswith(self.extensions)
 
 
 class PDFExtractor(DocumentExtractor):
     """Extract text from PDF files"""
     
-    def can_handle(self, file_path: str, mime_type: str) -> bool:
-        return (
-            mime_type == "application/pdf" or 
-            file_path.lower().endswith('.pdf')
-        )
+    mime_types = ("application/pdf",)
+    extensions = (".pdf",)
     
     def extract_text(self, file_path: str) -> str:
         if LANGCHAIN_AVAILABLE:
@@ -105,11 +105,8 @@ class PDFExtractor(DocumentExtractor):
 class DOCXExtractor(DocumentExtractor):
     """Extract text from DOCX files"""
     
-    def can_handle(self, file_path: str, mime_type: str) -> bool:
-        return (
-            mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" or
-            file_path.lower().endswith('.docx')
-        )
+    mime_types = ("application/vnd.openxmlformats-officedocument.wordprocessingml.document",)
+    extensions = (".docx",)
     
     def extract_text(self, file_path: str) -> str:
         if LANGCHAIN_AVAILABLE:
@@ -145,11 +142,8 @@ class DOCXExtractor(DocumentExtractor):
 class DOCExtractor(DocumentExtractor):
     """Extract text from DOC files"""
     
-    def can_handle(self, file_path: str, mime_type: str) -> bool:
-        return (
-            mime_type == "application/msword" or
-            file_path.lower().endswith('.doc')
-        )
+    mime_types = ("application/msword",)
+    extensions = (".doc",)
     
     def extract_text(self, file_path: str) -> str:
         if LANGCHAIN_AVAILABLE:
@@ -170,11 +164,8 @@ class DOCExtractor(DocumentExtractor):
 class CSVExtractor(DocumentExtractor):
     """Extract text from CSV files"""
     
-    def can_handle(self, file_path: str, mime_type: str) -> bool:
-        return (
-            mime_type == "text/csv" or
-            file_path.lower().endswith('.csv')
-        )
+    mime_types = ("text/csv",)
+    extensions = (".csv",)
     
     def extract_text(self, file_path: str) -> str:
         if LANGCHAIN_AVAILABLE:
@@ -221,11 +212,8 @@ class CSVExtractor(DocumentExtractor):
 class XLSXExtractor(DocumentExtractor):
     """Extract text from XLSX files"""
     
-    def can_handle(self, file_path: str, mime_type: str) -> bool:
-        return (
-            mime_type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" or
-            file_path.lower().endswith('.xlsx')
-        )
+    mime_types = ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",)
+    extensions = (".xlsx",)
     
     def extract_text(self, file_path: str) -> str:
         if PANDAS_AVAILABLE:
@@ -253,11 +241,8 @@ class XLSXExtractor(DocumentExtractor):
 class PPTXExtractor(DocumentExtractor):
     """Extract text from PPTX files"""
     
-    def can_handle(self, file_path: str, mime_type: str) -> bool:
-        return (
-            mime_type == "application/vnd.openxmlformats-officedocument.presentationml.presentation" or
-            file_path.lower().endswith('.pptx')
-        )
+    mime_types = ("application/vnd.openxmlformats-officedocument.presentationml.presentation",)
+    extensions = (".pptx",)
     
     def extract_text(self, file_path: str) -> str:
         if LANGCHAIN_AVAILABLE:
@@ -299,12 +284,8 @@ class PPTXExtractor(DocumentExtractor):
 class MP3AudioExtractor(DocumentExtractor):
     """Extract text from MP3 audio files via transcription"""
     
-    def can_handle(self, file_path: str, mime_type: str) -> bool:
-        return (
-            mime_type == "audio/mpeg" or
-            mime_type == "audio/mp3" or
-            file_path.lower().endswith('.mp3')
-        )
+    mime_types = ("audio/mpeg", "audio/mp3")
+    extensions = (".mp3",)
     
     def extract_text(self, file_path: str) -> str:
         try:
@@ -365,11 +346,11 @@ class MP3AudioExtractor(DocumentExtractor):
 class PlainTextExtractor(DocumentExtractor):
     """Extract text from plain text files"""
     
+    extensions = ('.txt', '.md', '.html', '.json')
+    
     def can_handle(self, file_path: str, mime_type: str) -> bool:
-        return (
-            mime_type.startswith("text/") or
-            file_path.lower().endswith(('.txt', '.md', '.html', '.json'))
-        )
+        # Any text/* MIME type, not just the ones listed in a dispatch table
+        return mime_type.startswith("text/") or super().can_handle(file_path, mime_type)
     
     def extract_text(self, file_path: str) -> str:
         encodings = ['utf-8', 'latin-1', 'ascii', 'utf-16']
@@ -405,6 +386,15 @@ class DocumentTextExtractor:
             PlainTextExtractor()
         ]
         
+        # Dispatch tables from MIME type / extension to the first registered extractor that declares it
+        self._by_mime: Dict[str, DocumentExtractor] = {}
+        self._by_extension: Dict[str, DocumentExtractor] = {}
+        for extractor in self.extractors:
+            for mime_type in extractor.mime_types:
+                self._by_mime.setdefault(mime_type, extractor)
+            for extension in extractor.extensions:
+                self._by_extension.setdefault(extension, extractor)
+        
         # Initialize text splitter for chunking
         if LANGCHAIN_AVAILABLE:
             self.text_splitter = RecursiveCharacterTextSplitter(
@@ -419,19 +409,37 @@ class DocumentTextExtractor:
         """Extract text from any supported document format"""
         try:
             # Find appropriate extractor
-            for extractor in self.extractors:
-                if extractor.can_handle(file_path, mime_type):
-                    text = extractor.extract_text(file_path)
-                    logger.info(f"Extracted {len(text)} characters from {file_path}")
-                    return text
+            extractor = self._find_extractor(file_path, mime_type)
+            if extractor is None:
+                raise ValueError(f"No extractor available for file type: {mime_type}")
             
-            # If no extractor found, raise error
-            raise ValueError(f"No extractor available for file type: {mime_type}")
+            text = extractor.extract_text(file_path)
+            logger.info(f"Extracted {len(text)} characters from {file_path}")
+            return text
             
         except Exception as e:
             logger.error(f"Document text extraction failed for {file_path}: {e}")
             raise
     
+    def _find_extractor(self, file_path: str, mime_type: str) -> Optional[DocumentExtractor]:
+        """Return the first registered extractor that can handle the file"""
+        candidates = [
+            extractor for extractor in (
+                self._by_mime.get(mime_type),
+                self._by_extension.get(Path(file_path).suffix.lower())
+            )
+            if extractor is not None
+        ]
+        if candidates:
+            # Keep registration order when MIME type and extension point at different extractors
+            return min(candidates, key=self.extractors.index)
+        
+        # Fall back to a scan for rules the tables cannot express, e.g. any text/* MIME type
+        for extractor in self.extractors:
+            if extractor.can_handle(file_path, mime_type):
+                return extractor
+        return None
+    
     def extract_and_chunk_text(self, file_path: str, mime_type: str) -> Dict[str, Any]:
         """Extract text and split into chunks for processing"""
         try:
@@ -1,11 +1,17 @@
 import os
 import io
 import time
+import hashlib
+import threading
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import asyncio
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
 
 # Google API imports
 try:
@@ -33,15 +39,131 @@ except ImportError:
     PYDUB_AVAILABLE = False
     logging.warning("pydub not available for audio processing")
 
+# Rust-backed tokenizer for token-aligned chunking (optional)
+try:
+    from tokenizers import Tokenizer
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    TOKENIZERS_AVAILABLE = False
+
 from src.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _load_chunk_tokenizer(name: str) -> Optional["Tokenizer"]:
+    """Load a pretrained tokenizer once per process; a failed load is remembered as None"""
+    try:
+        return Tokenizer.from_pretrained(name)
+    except Exception as e:
+        logger.warning(f"Failed to load chunk tokenizer {name}, using character chunks: {e}")
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing bursts of up to `burst` requests, refilled at `rate` per second"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping only when the bucket is empty"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens < 1:
+                wait = (1 - self.tokens) / self.rate
+                time.sleep(wait)
+                # The token refilled while sleeping is consumed straight away
+                self.tokens = 0.0
+                self.last = now + wait
+            else:
+                self.tokens -= 1
+
+
+class SemanticCache:
+    """Thread-safe cache of values keyed by embedding, matched by cosine similarity
+
+    Keys are stored as unit rows of one float32 (N, D) matrix so every lookup is a single
+    matrix-vector product rather than a Python loop over entries.
+    """
+
+    def __init__(self, threshold: float = 0.95, initial_capacity: int = 64):
+        if initial_capacity < 1:
+            raise ValueError("initial_capacity must be at least 1")
+        self.threshold = threshold
+        self.initial_capacity = initial_capacity
+        self.M: Optional[np.ndarray] = None
+        self.values: List[Any] = []
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        if norm == 0:
+            raise ValueError("Cannot cache a zero embedding")
+        return vec / norm
+
+    def _similarities(self, vec: np.ndarray) -> np.ndarray:
+        return self.M[:len(self.values)] @ vec
+
+    def put(self, embedding, value: Any) -> int:
+        """Cache value under embedding, replacing a near-duplicate entry; returns the row index used"""
+        vec = self._normalize(embedding)
+        with self.lock:
+            if self.values:
+                sims = self._similarities(vec)
+                best = int(np.argmax(sims))
+                if sims[best] > self.threshold:
+                    self.M[best] = vec
+                    self.values[best] = value
+                    return best
+
+            index = len(self.values)
+            if self.M is None:
+                self.M = np.empty((self.initial_capacity, vec.shape[0]), dtype=np.float32)
+            elif index == self.M.shape[0]:
+                # Grow geometrically so appends stay amortised O(D)
+                grown = np.empty((index * 2, self.M.shape[1]), dtype=np.float32)
+                grown[:index] = self.M
+                self.M = grown
+            self.M[index] = vec
+            self.values.append(value)
+            return index
+
+    def get(self, embedding, k: int = 1) -> List[Tuple[Any, float]]:
+        """Return up to k (value, similarity) pairs above the threshold, most similar first"""
+        vec = self._normalize(embedding)
+        with self.lock:
+            if not self.values:
+                return []
+            sims = self._similarities(vec)
+            k = min(k, len(sims))
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+            return [(self.values[i], float(sims[i])) for i in top if sims[i] > self.threshold]
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self.lock:
+            self.M = None
+            self.values = []
+
+
 class GoogleService:
     """Google API service for text embeddings and audio transcription"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, rate_per_sec: float = 10.0, burst: Optional[int] = None):
         # Try to get API key from environment variable first, then settings, then parameter
         self.api_key = (
             api_key or
@@ -56,9 +178,19 @@ class GoogleService:
         self.speech_client = None
         self.genai_configured = False
 
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 0.1  # 10 requests per second max
+        # Rate limiting: 10 requests per second, bursting up to one second's quota by default
+        self.rate_limiter = TokenBucket(rate_per_sec, burst or max(1, int(rate_per_sec)))
+
+        # Maximum number of chunks sent in a single embedding request
+        self.embedding_batch_size = settings.google_embedding_batch_size
+
+        # Maximum number of embedding requests in flight in the async path
+        self.max_concurrent_embeddings = 10
+
+        # LRU cache of chunk embeddings keyed by (model, blake2b digest of the chunk)
+        self.embedding_cache_size = 1024
+        self._embedding_cache: "OrderedDict[Tuple[str, bytes], np.ndarray]" = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()
 
         # Initialize services
         self._initialize_services()
@@ -118,61 +250,30 @@ class GoogleService:
             self.genai_configured = False
 
     def _rate_limit(self):
-        """Simple rate limiting"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
-            time.sleep(sleep_time)
-        self.last_request_time = time.time()
+        """Wait for a request slot from the token bucket"""
+        self.rate_limiter.acquire()
 
     def generate_text_embeddings(self, text: str, chunk_size: Optional[int] = None) -> List[List[float]]:
         """Generate embeddings for text using Google's embedding model"""
+        return self.generate_text_embeddings_array(text, chunk_size).tolist()
+
+    def generate_text_embeddings_array(self, text: str, chunk_size: Optional[int] = None) -> np.ndarray:
+        """Generate embeddings for text as a float32 array of shape (n_chunks, dimension)"""
         logger.info(f"Generating embeddings for text: {text[:50]}...")
         if not self.genai_configured:
             raise RuntimeError("Google Generative AI not configured")
 
         try:
-            chunk_size = chunk_size or settings.text_chunk_size
-
-            # Split text into chunks
-            if len(text) <= chunk_size:
-                chunks = [text]
-            else:
-                chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-
-            embeddings = []
-            for i, chunk in enumerate(chunks):
-                self._rate_limit()
+            model = settings.google_embedding_model
+            dimension = settings.text_embedding_dimension
+            chunks = self._split_text(text, chunk_size)
+            vectors_by_chunk, missing = self._lookup_cached_embeddings(model, chunks)
 
-                try:
-                    # Use Google's text embedding model
-                    result = genai.embed_content(
-                        model=settings.google_embedding_model,
-                        content=chunk,
-                        task_type="retrieval_document"
-                    )
-
-                    embedding = result['embedding']
-
-                    # Ensure embedding has correct dimensions
-                    if len(embedding) != settings.text_embedding_dimension:
-                        # Pad or truncate to match expected dimensions
-                        if len(embedding) < settings.text_embedding_dimension:
-                            embedding.extend([0.0] * (settings.text_embedding_dimension - len(embedding)))
-                        else:
-                            embedding = embedding[:settings.text_embedding_dimension]
-
-                    embeddings.append(embedding)
-                    logger.debug(f"Generated embedding for chunk {i+1}/{len(chunks)}")
+            for start in range(0, len(missing), self.embedding_batch_size):
+                batch = missing[start:start + self.embedding_batch_size]
+                vectors_by_chunk.update(zip(batch, self._embed_batch(model, batch, dimension, start)))
 
-                except Exception as e:
-                    logger.error(f"Failed to generate embedding for chunk {i}: {e}")
-                    # If using service account credentials, provide specific guidance
-                    if self.service_account_path and not self.api_key:
-                        logger.error("Service account credentials may not work with Generative AI SDK. Please provide GOOGLE_API_KEY for embeddings.")
-                    # Create zero embedding as fallback
-                    embeddings.append([0.0] * settings.text_embedding_dimension)
+            embeddings = np.stack([vectors_by_chunk[chunk] for chunk in chunks])
 
             logger.info(f"Generated {len(embeddings)} embeddings for text")
             return embeddings
@@ -184,6 +285,108 @@ class GoogleService:
                 logger.error("Service account credentials may not work with Generative AI SDK. Please provide GOOGLE_API_KEY for embeddings.")
             raise
 
+    def _split_text(self, text: str, chunk_size: Optional[int] = None) -> List[str]:
+        """Split text into chunks of chunk_size tokens if a chunk tokenizer is configured, else characters"""
+        chunk_size = chunk_size or settings.text_chunk_size
+        tokenizer = self._get_chunk_tokenizer()
+        if tokenizer is not None:
+            return self._split_text_by_tokens(text, chunk_size, tokenizer)
+
+        if len(text) <= chunk_size:
+            return [text]
+        return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
+
+    def _get_chunk_tokenizer(self) -> Optional["Tokenizer"]:
+        """Return the configured chunk tokenizer, or None to fall back to character chunks"""
+        name = settings.text_chunk_tokenizer
+        if not name or not TOKENIZERS_AVAILABLE:
+            return None
+        return _load_chunk_tokenizer(name)
+
+    @staticmethod
+    def _split_text_by_tokens(text: str, chunk_size: int, tokenizer: "Tokenizer") -> List[str]:
+        """Split text on token boundaries using the tokenizer's character offsets"""
+        offsets = tokenizer.encode(text, add_special_tokens=False).offsets
+        if len(offsets) <= chunk_size:
+            return [text]
+
+        # Each chunk runs from the start of its first token to the start of the next chunk
+        boundaries = [0] + [offsets[i][0] for i in range(chunk_size, len(offsets), chunk_size)] + [len(text)]
+        return [text[start:end] for start, end in zip(boundaries, boundaries[1:])]
+
+    def _lookup_cached_embeddings(self, model: str, chunks: List[str]) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        """Serve repeated chunks from the cache and return the unique chunks still to embed"""
+        vectors_by_chunk: Dict[str, np.ndarray] = {}
+        missing = []
+        for chunk in dict.fromkeys(chunks):
+            cached = self._get_cached_embedding(model, chunk)
+            if cached is not None:
+                vectors_by_chunk[chunk] = cached
+            else:
+                missing.append(chunk)
+        return vectors_by_chunk, missing
+
+    def _embed_batch(self, model: str, batch: List[str], dimension: int, start: int = 0) -> np.ndarray:
+        """Embed one batch of chunks in a single request, falling back to zero vectors on failure"""
+        self._rate_limit()
+
+        try:
+            result = genai.embed_content(
+                model=model,
+                content=batch,
+                task_type="retrieval_document"
+            )
+
+            # Ensure embeddings have correct dimensions, padding or truncating as needed
+            vectors = np.asarray(result['embedding'], dtype=np.float32)
+            if vectors.shape[1] < dimension:
+                vectors = np.pad(vectors, ((0, 0), (0, dimension - vectors.shape[1])))
+            else:
+                vectors = vectors[:, :dimension]
+
+            # Cached rows are views into this array, so freeze it
+            vectors.setflags(write=False)
+            for chunk, vector in zip(batch, vectors):
+                self._cache_embedding(model, chunk, vector)
+            logger.debug(f"Generated embeddings for chunks {start+1}-{start+len(batch)}")
+            return vectors
+
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings for chunks {start}-{start+len(batch)-1}: {e}")
+            # If using service account credentials, provide specific guidance
+            if self.service_account_path and not self.api_key:
+                logger.error("Service account credentials may not work with Generative AI SDK. Please provide GOOGLE_API_KEY for embeddings.")
+            # Create zero embeddings as fallback; these are not cached
+            return np.zeros((len(batch), dimension), dtype=np.float32)
+
+    @staticmethod
+    def _embedding_cache_key(model: str, chunk: str) -> Tuple[str, bytes]:
+        """Key a chunk by content hash so the cache does not hold the chunk text"""
+        return model, hashlib.blake2b(chunk.encode("utf-8"), digest_size=16).digest()
+
+    def _get_cached_embedding(self, model: str, chunk: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for a chunk, marking it as recently used"""
+        key = self._embedding_cache_key(model, chunk)
+        with self._embedding_cache_lock:
+            vector = self._embedding_cache.get(key)
+            if vector is not None:
+                self._embedding_cache.move_to_end(key)
+        return vector
+
+    def _cache_embedding(self, model: str, chunk: str, vector: np.ndarray):
+        """Store a chunk embedding, evicting the least recently used entries"""
+        key = self._embedding_cache_key(model, chunk)
+        with self._embedding_cache_lock:
+            self._embedding_cache[key] = vector
+            self._embedding_cache.move_to_end(key)
+            while len(self._embedding_cache) > self.embedding_cache_size:
+                self._embedding_cache.popitem(last=False)
+
+    def clear_embedding_cache(self):
+        """Drop all cached chunk embeddings"""
+        with self._embedding_cache_lock:
+            self._embedding_cache.clear()
+
     def transcribe_audio(self, audio_file_path: str) -> Dict[str, Any]:
         """Transcribe audio file to text using Google Speech-to-Text"""
         if not self.speech_client:
@@ -336,16 +539,34 @@ class GoogleService:
         return result
 
     async def generate_text_embeddings_async(self, text: str, chunk_size: Optional[int] = None) -> List[List[float]]:
-        """Async version of text embedding generation"""
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(
-                executor,
-                self.generate_text_embeddings,
-                text,
-                chunk_size
-            )
-        return result
+        """Async version of text embedding generation, sending batches concurrently"""
+        logger.info(f"Generating embeddings for text: {text[:50]}...")
+        if not self.genai_configured:
+            raise RuntimeError("Google Generative AI not configured")
+
+        model = settings.google_embedding_model
+        dimension = settings.text_embedding_dimension
+        chunks = self._split_text(text, chunk_size)
+        vectors_by_chunk, missing = self._lookup_cached_embeddings(model, chunks)
+
+        # Bound the number of embedding requests in flight at once
+        semaphore = asyncio.Semaphore(self.max_concurrent_embeddings)
+
+        async def _embed(batch: List[str], start: int) -> np.ndarray:
+            async with semaphore:
+                return await asyncio.to_thread(self._embed_batch, model, batch, dimension, start)
+
+        batches = [
+            (missing[start:start + self.embedding_batch_size], start)
+            for start in range(0, len(missing), self.embedding_batch_size)
+        ]
+        results = await asyncio.gather(*(_embed(batch, start) for batch, start in batches))
+        for (batch, _), vectors in zip(batches, results):
+            vectors_by_chunk.update(zip(batch, vectors))
+
+        embeddings = np.stack([vectors_by_chunk[chunk] for chunk in chunks])
+        logger.info(f"Generated {len(embeddings)} embeddings for text")
+        return embeddings.tolist()
 
     def get_service_status(self) -> Dict[str, Any]:
         """Get status of Google API services"""
@@ -477,13 +698,19 @@ class GoogleService:
         return result
 
 
-# Global service instance
-# Global instance will be created when needed
-google_service = None
+@lru_cache(maxsize=8)
+def _build_google_service(api_key: Optional[str]) -> GoogleService:
+    return GoogleService(api_key=api_key)
+
 
 def get_google_service(api_key: Optional[str] = None) -> GoogleService:
-    """Get or create the global GoogleService instance."""
-    global google_service
-    if google_service is None:
-        google_service = GoogleService(api_key=api_key)
-    return google_service
+    """Get or create the shared GoogleService instance.
+
+    One instance is cached per api_key, up to eight keys; omitting api_key and
+    passing None share an instance. Call get_google_service.cache_clear() to
+    force a rebuild (e.g. after credentials change).
+    """
+    return _build_google_service(api_key)
+
+
+get_google_service.cache_clear = _build_google_service.cache_clear
@@ -0,0 +1,49 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.services.document_extractor import DocumentTextExtractor, document_extractor
+from src.services.external_apis.google_service import GoogleService, get_google_service
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractAndEmbedPipeline:
+    """Overlap document text extraction with embedding requests"""
+
+    def __init__(self, extractor: Optional[DocumentTextExtractor] = None,
+                 google_service: Optional[GoogleService] = None, max_workers: int = 4):
+        self.extractor = extractor or document_extractor
+        self.google_service = google_service or get_google_service()
+        self.max_workers = max_workers
+
+    def extract_and_embed(self, file_path: str, mime_type: str) -> np.ndarray:
+        """Extract a single document and embed it as a (n_chunks, dimension) float32 array"""
+        text = self.extractor.extract_text(file_path, mime_type)
+        return self.google_service.generate_text_embeddings_array(text)
+
+    def extract_and_embed_many(self, files: Sequence[Tuple[str, str]]) -> List[np.ndarray]:
+        """Extract and embed (file_path, mime_type) pairs, returning one array per file in input order
+
+        Extraction runs on a thread pool while the calling thread embeds documents as soon as
+        their text is ready, so file parsing is hidden behind embedding round-trips.
+        """
+        embeddings = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self.extractor.extract_text, file_path, mime_type)
+                for file_path, mime_type in files
+            ]
+            try:
+                for (file_path, _), future in zip(files, futures):
+                    text = future.result()
+                    logger.info(f"Embedding {len(text)} extracted characters from {file_path}")
+                    embeddings.append(self.google_service.generate_text_embeddings_array(text))
+            except Exception:
+                # Don't start extracting files whose results would be discarded
+                for future in futures:
+                    future.cancel()
+                raise
+        return embeddings
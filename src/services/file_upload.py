@@ -1,6 +1,7 @@
 import os
 import uuid
 import hashlib
+from functools import lru_cache
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, Any, List
@@ -26,6 +27,10 @@ except ImportError:
     MAGIC_AVAILABLE = False
     logger.warning("python-magic not available, using fallback file type detection")
 
+# Only the leading bytes of a file are inspected when detecting its type
+FILE_TYPE_SNIFF_BYTES = 8192
+FILE_TYPE_CACHE_SIZE = 256
+
 
 class FileValidator:
     """Handles file validation including type, size, and content checks"""
@@ -44,12 +49,31 @@ class FileValidator:
         return file_size <= self.max_size
     
     def detect_file_type(self, file_content: bytes, filename: str = None) -> Dict[str, str]:
-        """Detect file type using python-magic or fallback methods"""
+        """Detect file type using python-magic or fallback methods
+
+        Detection only looks at the first FILE_TYPE_SNIFF_BYTES of the content,
+        so results are memoized per (header, extension) and repeated uploads of
+        the same file skip re-sniffing. Use clear_file_type_cache() to reset.
+        """
+        header = file_content[:FILE_TYPE_SNIFF_BYTES]
+        extension = Path(filename).suffix.lower() if filename else ""
+        return dict(self._detect_file_type_cached(header, extension))
+    
+    @classmethod
+    def clear_file_type_cache(cls) -> None:
+        """Drop all memoized file type detection results"""
+        cls._detect_file_type_cached.cache_clear()
+    
+    @staticmethod
+    @lru_cache(maxsize=FILE_TYPE_CACHE_SIZE)
+    def _detect_file_type_cached(file_content: bytes, extension: str) -> Dict[str, str]:
+        """Detect file type for a content header and filename extension; shared by all validators"""
+        filename = f"file{extension}" if extension else None
         try:
             if MAGIC_AVAILABLE:
                 mime_type = magic.from_buffer(file_content, mime=True)
                 file_type = magic.from_buffer(file_content)
-                extension = self._mime_to_extension(mime_type)
+                extension = FileValidator._mime_to_extension(mime_type)
                 
                 return {
                     "mime_type": mime_type,
@@ -58,13 +82,14 @@ class FileValidator:
                 }
             else:
                 # Fallback: use file extension and content analysis
-                return self._fallback_file_type_detection(file_content, filename)
+                return FileValidator._fallback_file_type_detection(file_content, filename)
                 
         except Exception as e:
             logger.error(f"Error detecting file type: {e}")
-            return self._fallback_file_type_detection(file_content, filename)
+            return FileValidator._fallback_file_type_detection(file_content, filename)
     
-    def _fallback_file_type_detection(self, file_content: bytes, filename: str = None) -> Dict[str, str]:
+    @staticmethod
+    def _fallback_file_type_detection(file_content: bytes, filename: str = None) -> Dict[str, str]:
         """Fallback file type detection based on content and extension"""
         extension = "bin"
         mime_type = "application/octet-stream"
@@ -75,7 +100,7 @@ class FileValidator:
             ext = Path(filename).suffix.lower().lstrip('.')
             if ext:
                 extension = ext
-                mime_type = self._extension_to_mime(ext)
+                mime_type = FileValidator._extension_to_mime(ext)
                 file_type = f"{ext} file"
         
         # Simple content-based detection
@@ -99,7 +124,7 @@ class FileValidator:
             # Check if it's markdown content
             try:
                 content_str = file_content.decode('utf-8', errors='ignore')
-                if self._is_markdown_content(content_str):
+                if FileValidator._is_markdown_content(content_str):
                     mime_type = "text/markdown"
                     extension = "md"
                     file_type = "Markdown document"
@@ -118,7 +143,8 @@ class FileValidator:
             "extension": extension
         }
     
-    def _extension_to_mime(self, extension: str) -> str:
+    @staticmethod
+    def _extension_to_mime(extension: str) -> str:
         """Convert file extension to MIME type"""
         ext_mime_map = {
             "txt": "text/plain",
@@ -150,7 +176,8 @@ class FileValidator:
         }
         return ext_mime_map.get(extension.lower(), "application/octet-stream")
     
-    def _mime_to_extension(self, mime_type: str) -> str:
+    @staticmethod
+    def _mime_to_extension(mime_type: str) -> str:
         """Convert MIME type to file extension"""
         mime_extensions = {
             "text/plain": "txt",
@@ -177,7 +204,8 @@ class FileValidator:
         }
         return mime_extensions.get(mime_type, "bin")
     
-    def _is_markdown_content(self, content: str) -> bool:
+    @staticmethod
+    def _is_markdown_content(content: str) -> bool:
         """Check if content has markdown characteristics"""
         # Common markdown patterns
         markdown_patterns = [
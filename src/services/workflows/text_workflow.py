@@ -4,12 +4,15 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from collections import Counter
 from datetime import datetime
 from typing import List, Dict, Any
 import re
 
 from src.services.workflow_base import BaseWorkflow, WorkflowInput, WorkflowOutput
 
+_KEYWORD_PATTERN = re.compile(r'\b[a-zA-Z]{4,}\b')
+
 
 class TextWorkflow(BaseWorkflow):
     def __init__(self):
@@ -60,13 +63,10 @@ class TextWorkflow(BaseWorkflow):
     
     def _extract_keywords(self, content: str) -> List[str]:
         # Simple keyword extraction
-        words = re.findall(r'\b[a-zA-Z]{4,}\b', content.lower())
-        word_freq = {}
-        for word in words:
-            word_freq[word] = word_freq.get(word, 0) + 1
+        word_freq = Counter(_KEYWORD_PATTERN.findall(content.lower()))
         
-        # Return top 10 keywords
-        return [word for word, freq in sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]]
+        # Return top 10 keywords; ties keep first-occurrence order
+        return [word for word, freq in word_freq.most_common(10)]
     
     def _generate_summary(self, content: str) -> str:
         # Simple summary - first 200 characters
@@ -1,3 +1,69 @@
-import sys
+import copy
 import os
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock
+
+import pytest
+
+from src.services.external_apis.google_service import GoogleService, TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def mock_genai(monkeypatch):
+    """Replace the google_service genai module for every test so no test reaches the real API"""
+    fake_genai = MagicMock()
+    monkeypatch.setattr("src.services.external_apis.google_service.genai", fake_genai)
+    return fake_genai
+
+
+@pytest.fixture
+def batch_embedding_response():
+    """Factory for genai.embed_content side effects that embed every chunk in a batch"""
+    def _make(embedding):
+        def _embed_content(model, content, task_type):
+            return {'embedding': [list(embedding) for _ in content]}
+        return _embed_content
+    return _make
+
+
+@pytest.fixture
+def make_recognize_response():
+    """Factory for speech_client.recognize responses holding a single alternative"""
+    def _make(transcript, confidence=0.95, words=()):
+        alternative = SimpleNamespace(transcript=transcript, confidence=confidence, words=list(words))
+        return SimpleNamespace(results=[SimpleNamespace(alternatives=[alternative])])
+    return _make
+
+
+@pytest.fixture(scope="session")
+def milvus_lite_uri(tmp_path_factory):
+    """Milvus Lite database file owned by this test process
+
+    Each pytest-xdist worker gets its own file, since a Milvus Lite database
+    cannot be opened by several processes at once.
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    return str(tmp_path_factory.mktemp(f"milvus_{worker}") / "milvus_lite.db")
+
+
+@pytest.fixture(scope="session")
+def base_google_service():
+    """Build one GoogleService for the whole test session"""
+    return GoogleService(api_key="test_key")
+
+
+@pytest.fixture
+def google_service(base_google_service):
+    """Per-test shallow copy of the session GoogleService with a fresh speech client and empty cache"""
+    service = copy.copy(base_google_service)
+    service.genai_configured = True
+    service.speech_client = Mock()
+    # The shallow copy would share the session's token bucket and embedding
+    # cache; give each test its own bucket that never runs dry so no test
+    # sleeps on the rate limit, and its own empty cache and lock
+    service.rate_limiter = TokenBucket(rate=1e9, burst=1_000_000)
+    service._embedding_cache = OrderedDict()
+    service._embedding_cache_lock = threading.Lock()
+    return service
@@ -5,9 +5,6 @@ from unittest.mock import Mock, patch, mock_open, MagicMock
 from pathlib import Path
 from typing import Dict, Any
 
-import sys
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-
 from src.services.document_extractor import (
     DocumentTextExtractor, 
     PDFExtractor, 
@@ -228,6 +225,19 @@ class TestDocumentTextExtractor:
         assert result == "Plain text content"
         mock_extract.assert_called_once_with("test.txt")
     
+    def test_extract_text_routing_precedence(self):
+        """Test the first registered extractor wins when MIME type and extension disagree"""
+        extractor = DocumentTextExtractor()
+        
+        # A .pdf path with a text/* MIME type still goes to the PDF extractor
+        with patch.object(extractor.extractors[0], 'extract_text', return_value="PDF content"):
+            assert extractor.extract_text("report.pdf", "text/plain") == "PDF content"
+        
+        # Unlisted text/* MIME types fall back to the plain text extractor
+        plain_text = next(e for e in extractor.extractors if isinstance(e, PlainTextExtractor))
+        with patch.object(plain_text, 'extract_text', return_value="Plain text content"):
+            assert extractor.extract_text("notes.log", "text/x-log") == "Plain text content"
+    
     def test_extract_text_unsupported_type(self):
         """Test extraction with unsupported file type"""
         extractor = DocumentTextExtractor()
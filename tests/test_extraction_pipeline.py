@@ -0,0 +1,65 @@
+import threading
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from src.services.extraction_pipeline import ExtractAndEmbedPipeline
+
+FILES = [("a.pdf", "application/pdf"), ("b.txt", "text/plain"), ("c.md", "text/markdown")]
+
+
+@pytest.fixture
+def extractor():
+    """Extractor returning the file name as its text and recording the extracting thread"""
+    extractor = Mock()
+    extractor.threads = set()
+
+    def _extract_text(file_path, mime_type):
+        extractor.threads.add(threading.get_ident())
+        return f"text of {file_path}"
+
+    extractor.extract_text.side_effect = _extract_text
+    return extractor
+
+
+@pytest.fixture
+def mock_embedder():
+    """Mock GoogleService embedding each text as a one-row array of its length"""
+    service = Mock()
+    service.generate_text_embeddings_array.side_effect = lambda text: np.full((1, 3), len(text), dtype=np.float32)
+    return service
+
+
+class TestExtractAndEmbedPipeline:
+    """Test overlapping document extraction with embedding"""
+
+    def test_extract_and_embed(self, extractor, mock_embedder):
+        """Test a single document is extracted then embedded"""
+        pipeline = ExtractAndEmbedPipeline(extractor, mock_embedder)
+
+        result = pipeline.extract_and_embed("a.pdf", "application/pdf")
+
+        extractor.extract_text.assert_called_once_with("a.pdf", "application/pdf")
+        mock_embedder.generate_text_embeddings_array.assert_called_once_with("text of a.pdf")
+        assert result.shape == (1, 3)
+
+    def test_extract_and_embed_many_preserves_order(self, extractor, mock_embedder):
+        """Test documents are extracted on worker threads and embedded in input order"""
+        pipeline = ExtractAndEmbedPipeline(extractor, mock_embedder, max_workers=2)
+
+        results = pipeline.extract_and_embed_many(FILES)
+
+        embedded_texts = [c.args[0] for c in mock_embedder.generate_text_embeddings_array.call_args_list]
+        assert embedded_texts == [f"text of {path}" for path, _ in FILES]
+        assert [int(r[0, 0]) for r in results] == [len(text) for text in embedded_texts]
+        assert threading.get_ident() not in extractor.threads
+
+    def test_extract_and_embed_many_propagates_extraction_error(self, extractor, mock_embedder):
+        """Test an extraction failure is raised to the caller"""
+        extractor.extract_text.side_effect = ValueError("No extractor available for file type: unknown/type")
+        pipeline = ExtractAndEmbedPipeline(extractor, mock_embedder)
+
+        with pytest.raises(ValueError, match="No extractor available"):
+            pipeline.extract_and_embed_many([("x.xyz", "unknown/type")])
+        mock_embedder.generate_text_embeddings_array.assert_not_called()
@@ -5,20 +5,22 @@ pytest-compatible test suite for file upload service functionality.
 """
 
 import os
-import sys
 import asyncio
 import tempfile
 import pytest
 from pathlib import Path
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
-
 from src.services.file_upload import FileValidator, FileStorage, FileUploadService
 from src.database.connection import get_db, init_db
 from src.config.settings import settings
 from src.database.crud import file_crud
-from src.models.metadata import FileMetadata, DocumentType, ContentCategory, EmployeeRole, PriorityLevel, AccessLevel
+from src.models.metadata import (
+    FileMetadata, DocumentType, ContentCategory, EmployeeRole, PriorityLevel, AccessLevel,
+    HealthcareMetadata, UniversityMetadata
+)
+
+# Test file content shared by all tests
+TEST_CONTENT: bytes = b"Hello, World! This is a test file."
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -45,13 +47,7 @@ def upload_service():
     return FileUploadService()
 
 
-@pytest.fixture
-def test_content():
-    """Test file content"""
-    return b"Hello, World! This is a test file."
-
-
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_metadata():
     """Test file metadata"""
     return FileMetadata(
@@ -95,21 +91,30 @@ class TestFileValidator:
         """Test invalid file size"""
         assert validator.validate_file_size(settings.max_file_size + 1) is False
     
-    def test_detect_file_type(self, validator, test_content):
+    def test_detect_file_type(self, validator):
         """Test file type detection"""
-        type_info = validator.detect_file_type(test_content, "test.txt")
+        type_info = validator.detect_file_type(TEST_CONTENT, "test.txt")
         assert type_info['mime_type'] == "text/plain"
         assert type_info['extension'] == "txt"
     
-    def test_comprehensive_validation_valid(self, validator, test_content):
+    def test_detect_file_type_cached(self, validator):
+        """Test repeated file type detection is served from cache, across validator instances"""
+        FileValidator.clear_file_type_cache()
+        first = validator.detect_file_type(TEST_CONTENT, "test.txt")
+        second = FileValidator().detect_file_type(TEST_CONTENT, "test.txt")
+        assert first == second
+        assert first is not second
+        assert FileValidator._detect_file_type_cached.cache_info().hits == 1
+
+    def test_comprehensive_validation_valid(self, validator):
         """Test comprehensive file validation with valid file"""
-        result = validator.validate_file("test.txt", 1024, test_content)
+        result = validator.validate_file("test.txt", 1024, TEST_CONTENT)
         assert result['valid'] is True
         assert len(result['errors']) == 0
     
-    def test_comprehensive_validation_invalid_extension(self, validator, test_content):
+    def test_comprehensive_validation_invalid_extension(self, validator):
         """Test comprehensive file validation with invalid extension"""
-        result = validator.validate_file("test.exe", 1024, test_content)
+        result = validator.validate_file("test.exe", 1024, TEST_CONTENT)
         assert result['valid'] is False
         assert len(result['errors']) > 0
 
@@ -130,19 +135,19 @@ class TestFileStorage:
         assert isinstance(file_path, Path)
         assert str(file_path).endswith(f"{file_id}.txt")
     
-    def test_calculate_file_hash(self, storage, test_content):
+    def test_calculate_file_hash(self, storage):
         """Test file hash calculation"""
-        file_hash = storage.calculate_file_hash(test_content)
+        file_hash = storage.calculate_file_hash(TEST_CONTENT)
         assert isinstance(file_hash, str)
         assert len(file_hash) == 64  # SHA-256 hash length
     
     @pytest.mark.asyncio
-    async def test_save_and_delete_file(self, storage, test_content):
+    async def test_save_and_delete_file(self, storage):
         """Test file saving and deletion"""
         file_id = storage.generate_file_id()
         
         # Test file saving
-        save_result = await storage.save_file(file_id, "test.txt", test_content)
+        save_result = await storage.save_file(file_id, "test.txt", TEST_CONTENT)
         assert save_result['storage_success'] is True
         assert os.path.exists(save_result['file_path'])
         
@@ -155,7 +160,7 @@ class TestFileStorage:
 class TestDatabaseIntegration:
     """Test database integration"""
     
-    def test_create_and_retrieve_file_record(self, db_session, storage, test_content, test_metadata):
+    def test_create_and_retrieve_file_record(self, db_session, storage, test_metadata):
         """Test creating and retrieving file records"""
         file_id = storage.generate_file_id()
         file_path = storage.generate_file_path(file_id, "test.txt")
@@ -165,7 +170,7 @@ class TestDatabaseIntegration:
             "filename": f"{file_id}.txt",
             "original_filename": "test.txt",
             "file_path": str(file_path),
-            "file_size": len(test_content),
+            "file_size": len(TEST_CONTENT),
             "file_type": "txt",
             "mime_type": "text/plain",
             "status": "uploaded",
@@ -192,7 +197,7 @@ class TestDatabaseIntegration:
         file_crud.delete_file(db_session, file_id)
     
     @pytest.mark.asyncio
-    async def test_file_info_service(self, upload_service, db_session, storage, test_content, test_metadata):
+    async def test_file_info_service(self, upload_service, db_session, storage, test_metadata):
         """Test file info service"""
         file_id = storage.generate_file_id()
         file_path = storage.generate_file_path(file_id, "test.txt")
@@ -202,7 +207,7 @@ class TestDatabaseIntegration:
             "filename": f"{file_id}.txt",
             "original_filename": "test.txt",
             "file_path": str(file_path),
-            "file_size": len(test_content),
+            "file_size": len(TEST_CONTENT),
             "file_type": "txt",
             "mime_type": "text/plain",
             "status": "uploaded",
@@ -230,7 +235,7 @@ class TestCompleteUploadWorkflow:
     """Test complete upload workflow"""
     
     @pytest.mark.asyncio
-    async def test_complete_upload_workflow(self, upload_service, db_session, test_content, test_metadata):
+    async def test_complete_upload_workflow(self, upload_service, db_session, test_metadata):
         """Test complete file upload workflow"""
         
         # Mock UploadFile
@@ -246,7 +251,7 @@ class TestCompleteUploadWorkflow:
             async def seek(self, position):
                 self._position = position
         
-        mock_file = MockUploadFile("test_upload.txt", test_content)
+        mock_file = MockUploadFile("test_upload.txt", TEST_CONTENT)
         
         # Test upload
         result = await upload_service.upload_file(
@@ -279,10 +284,8 @@ class TestCompleteUploadWorkflow:
         assert success is True
     
     @pytest.mark.asyncio
-    async def test_healthcare_metadata_workflow(self, upload_service, db_session, test_content):
+    async def test_healthcare_metadata_workflow(self, upload_service, db_session):
         """Test healthcare-specific metadata workflow"""
-        from src.models.metadata import HealthcareMetadata
-        
         healthcare_metadata = HealthcareMetadata(
             specialty="cardiology",
             patient_id="P12345",
@@ -314,7 +317,7 @@ class TestCompleteUploadWorkflow:
             async def seek(self, position):
                 pass
         
-        mock_file = MockUploadFile("patient_record.txt", test_content)
+        mock_file = MockUploadFile("patient_record.txt", TEST_CONTENT)
         
         # Test upload
         result = await upload_service.upload_file(
@@ -332,10 +335,8 @@ class TestCompleteUploadWorkflow:
         await upload_service.delete_file(result['file_id'], db_session)
     
     @pytest.mark.asyncio
-    async def test_university_metadata_workflow(self, upload_service, db_session, test_content):
+    async def test_university_metadata_workflow(self, upload_service, db_session):
         """Test university-specific metadata workflow"""
-        from src.models.metadata import UniversityMetadata
-        
         university_metadata = UniversityMetadata(
             course_code="CS101",
             semester="Fall 2024",
@@ -367,7 +368,7 @@ class TestCompleteUploadWorkflow:
             async def seek(self, position):
                 pass
         
-        mock_file = MockUploadFile("lecture_notes.txt", test_content)
+        mock_file = MockUploadFile("lecture_notes.txt", TEST_CONTENT)
         
         # Test upload
         result = await upload_service.upload_file(
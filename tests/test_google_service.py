@@ -1,14 +1,57 @@
 import pytest
 import os
 import io
-import time
+import math
+from types import SimpleNamespace
 from unittest.mock import Mock, patch, MagicMock, call, mock_open
 from typing import Dict, Any, List
 
-import sys
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import numpy as np
 
-from src.services.external_apis.google_service import GoogleService
+from src.services.external_apis.google_service import GoogleService, SemanticCache
+
+GOOGLE_SERVICE_MODULE = 'src.services.external_apis.google_service'
+
+# Settings every test starts from; tests override fields on `patched_settings`
+DEFAULT_SETTINGS = SimpleNamespace(
+    google_api_key=None,
+    google_speech_language="en-US",
+    google_speech_model="latest_long",
+    enable_speaker_diarization=True,
+    max_speakers=6,
+    text_chunk_size=1000,
+    text_chunk_tokenizer=None,
+    text_embedding_dimension=1536,
+    google_embedding_model="test-model",
+    google_embedding_batch_size=100
+)
+
+# Shared API failure raised by mocked Google clients
+_API_ERROR = RuntimeError("API Error")
+
+# Built once; reset after each test by the `fake_audio_open` fixture
+_FAKE_AUDIO_OPEN = mock_open(read_data=b"raw_audio_data")
+
+# Sample texts shared across tests
+_LONG_TEXT = "This is a very long text that will be split into multiple chunks"
+_LONG_TEXT_CHUNK10 = math.ceil(len(_LONG_TEXT) / 10)
+_MEDICAL_TEXT = "Patient diagnosed with hypertension. Prescribed medication X."
+_LECTURE_TRANSCRIPT = "Today we will discuss machine learning algorithms and their applications"
+
+
+@pytest.fixture
+def fake_audio_open():
+    """Shared mock_open returning raw audio bytes"""
+    yield _FAKE_AUDIO_OPEN
+    _FAKE_AUDIO_OPEN.reset_mock()
+
+
+@pytest.fixture(autouse=True)
+def patched_settings(monkeypatch):
+    """Replace the google_service settings with a fresh copy of DEFAULT_SETTINGS"""
+    fake_settings = SimpleNamespace(**vars(DEFAULT_SETTINGS))
+    monkeypatch.setattr(f'{GOOGLE_SERVICE_MODULE}.settings', fake_settings)
+    return fake_settings
 
 
 class TestGoogleServiceInitialization:
@@ -20,10 +63,9 @@ class TestGoogleServiceInitialization:
         assert service.api_key == "test_key_param"
     
     
-    @patch('src.services.external_apis.google_service.settings')
-    def test_init_with_settings_fallback(self, mock_settings):
+    def test_init_with_settings_fallback(self, patched_settings):
         """Test initialization with settings fallback"""
-        mock_settings.google_api_key = "settings_key"
+        patched_settings.google_api_key = "settings_key"
         service = GoogleService()
         assert service.api_key == "settings_key"
     
@@ -52,109 +94,63 @@ class TestGoogleServiceInitialization:
     def test_initialization_without_api_key(self):
         """Test initialization without API key"""
         with patch.dict(os.environ, {}, clear=True):
-            with patch('src.services.external_apis.google_service.settings') as mock_settings:
-                mock_settings.google_api_key = None
-                service = GoogleService()
-                
-                assert service.api_key is None
-                assert service.genai_configured == False
+            service = GoogleService()
+            
+            assert service.api_key is None
+            assert service.genai_configured == False
 
 
 class TestTextEmbeddingGeneration:
     """Test text embedding generation functionality"""
     
-    def setup_method(self):
-        """Setup for each test method"""
-        self.service = GoogleService(api_key="test_key")
-        self.service.genai_configured = True
-    
-    @patch('src.services.external_apis.google_service.genai')
-    @patch('src.services.external_apis.google_service.settings')
-    def test_generate_text_embeddings_single_chunk(self, mock_settings, mock_genai):
-        """Test embedding generation for single chunk"""
-        mock_settings.text_chunk_size = 1000
-        mock_settings.text_embedding_dimension = 1536
+    @pytest.mark.parametrize("api_dim,target_dim,expect_dim", [
+        (1536, 1536, 1536),
+        (3, 1536, 1536),
+        (2000, 100, 100),
+    ], ids=["single_chunk", "dimension_padding", "dimension_truncation"])
+    def test_generate_text_embeddings_dimensions(self, google_service, patched_settings, mock_genai, api_dim, target_dim, expect_dim):
+        """Test single chunk embedding generation with dimension padding and truncation"""
+        patched_settings.text_embedding_dimension = target_dim
         
-        # Mock API response
+        # Mock API response with api_dim dimensions
         mock_genai.embed_content.return_value = {
-            'embedding': [0.1, 0.2, 0.3] * 512  # 1536 dimensions
+            'embedding': [[0.1] * api_dim]
         }
         
-        result = self.service.generate_text_embeddings("Short text")
+        result = google_service.generate_text_embeddings("Short text")
         
         assert len(result) == 1
-        assert len(result[0]) == 1536
-        mock_genai.embed_content.assert_called_once_with(
-            model=mock_settings.google_embedding_model,
-            content="Short text",
-            task_type="retrieval_document"
-        )
+        assert len(result[0]) == expect_dim
+        kept_dim = min(api_dim, target_dim)
+        assert np.allclose(result[0][:kept_dim], 0.1)
+        assert not np.any(result[0][kept_dim:])  # Padding should be zeros
+        assert mock_genai.embed_content.call_count == 1
+        assert mock_genai.embed_content.call_args.kwargs == {
+            "model": patched_settings.google_embedding_model,
+            "content": ["Short text"],
+            "task_type": "retrieval_document"
+        }
     
-    @patch('src.services.external_apis.google_service.genai')
-    @patch('src.services.external_apis.google_service.settings')
-    def test_generate_text_embeddings_multiple_chunks(self, mock_settings, mock_genai):
+    def test_generate_text_embeddings_multiple_chunks(self, google_service, patched_settings, mock_genai, batch_embedding_response):
         """Test embedding generation for multiple chunks"""
-        mock_settings.text_chunk_size = 10
-        mock_settings.text_embedding_dimension = 1536
+        patched_settings.text_chunk_size = 10
+        google_service.embedding_batch_size = 3
         
         # Mock API response
-        mock_genai.embed_content.return_value = {
-            'embedding': [0.1] * 1536
-        }
+        mock_genai.embed_content.side_effect = batch_embedding_response([0.1] * 1536)
         
-        long_text = "This is a very long text that will be split into multiple chunks"
-        result = self.service.generate_text_embeddings(long_text)
+        result = google_service.generate_text_embeddings(_LONG_TEXT)
         
-        # Should have multiple chunks
-        assert len(result) > 1
+        # Should have multiple chunks, embedded in batches
+        assert len(result) == _LONG_TEXT_CHUNK10
         assert all(len(embedding) == 1536 for embedding in result)
-        assert mock_genai.embed_content.call_count > 1
-    
-    @patch('src.services.external_apis.google_service.genai')
-    @patch('src.services.external_apis.google_service.settings')
-    def test_generate_text_embeddings_dimension_padding(self, mock_settings, mock_genai):
-        """Test embedding dimension padding"""
-        mock_settings.text_embedding_dimension = 1536
-        mock_settings.text_chunk_size = 1000
-        
-        # Mock API response with fewer dimensions
-        mock_genai.embed_content.return_value = {
-            'embedding': [0.1, 0.2, 0.3]  # Only 3 dimensions
-        }
-        
-        result = self.service.generate_text_embeddings("Test text")
-        
-        assert len(result) == 1
-        assert len(result[0]) == 1536
-        assert result[0][:3] == [0.1, 0.2, 0.3]
-        assert all(x == 0.0 for x in result[0][3:])  # Rest should be zeros
-    
-    @patch('src.services.external_apis.google_service.genai')
-    @patch('src.services.external_apis.google_service.settings')
-    def test_generate_text_embeddings_dimension_truncation(self, mock_settings, mock_genai):
-        """Test embedding dimension truncation"""
-        mock_settings.text_embedding_dimension = 100
-        mock_settings.text_chunk_size = 1000
-        
-        # Mock API response with more dimensions
-        mock_genai.embed_content.return_value = {
-            'embedding': [0.1] * 2000  # 2000 dimensions
-        }
-        
-        result = self.service.generate_text_embeddings("Test text")
-        
-        assert len(result) == 1
-        assert len(result[0]) == 100
+        assert mock_genai.embed_content.call_count == math.ceil(len(result) / google_service.embedding_batch_size)
     
-    @patch('src.services.external_apis.google_service.genai')
-    @patch('src.services.external_apis.google_service.settings')
-    def test_generate_text_embeddings_api_error(self, mock_settings, mock_genai):
+    def test_generate_text_embeddings_api_error(self, google_service, patched_settings, mock_genai):
         """Test handling of API errors in embedding generation"""
-        mock_settings.text_embedding_dimension = 1536
-        mock_settings.text_chunk_size = 1000
-        mock_genai.embed_content.side_effect = Exception("API Error")
+        mock_genai.embed_content.side_effect = _API_ERROR
         
-        result = self.service.generate_text_embeddings("Test text")
+        result = google_service.generate_text_embeddings("Test text")
         
         # Should return zero embedding as fallback
         assert len(result) == 1
@@ -169,96 +165,177 @@ class TestTextEmbeddingGeneration:
         with pytest.raises(RuntimeError, match="Google Generative AI not configured"):
             service.generate_text_embeddings("Test text")
     
-    @patch('src.services.external_apis.google_service.genai')
-    @patch('src.services.external_apis.google_service.settings')
-    def test_generate_text_embeddings_custom_chunk_size(self, mock_settings, mock_genai):
+    def test_generate_text_embeddings_custom_chunk_size(self, google_service, patched_settings, mock_genai, batch_embedding_response):
         """Test embedding generation with custom chunk size"""
-        mock_settings.text_embedding_dimension = 1536
-        mock_settings.text_chunk_size = 1000
-        mock_genai.embed_content.return_value = {'embedding': [0.1] * 1536}
+        mock_genai.embed_content.side_effect = batch_embedding_response([0.1] * 1536)
         
-        result = self.service.generate_text_embeddings("Test text", chunk_size=5)
+        result = google_service.generate_text_embeddings("Test text", chunk_size=5)
         
         # Should use custom chunk size
-        assert len(result) >= 1
+        assert len(result) == 2
+    
+    def test_generate_text_embeddings_token_chunks(self, google_service, patched_settings, mock_genai, batch_embedding_response, monkeypatch):
+        """Test chunks follow token boundaries when a chunk tokenizer is configured"""
+        text = "alpha beta gamma delta epsilon"
+        # Whitespace tokenizer exposing character offsets like tokenizers.Encoding
+        offsets = [(i, i + len(word)) for i, word in zip([0, 6, 11, 17, 23], text.split())]
+        fake_tokenizer = SimpleNamespace(encode=lambda text, add_special_tokens: SimpleNamespace(offsets=offsets))
+        monkeypatch.setattr(f'{GOOGLE_SERVICE_MODULE}.TOKENIZERS_AVAILABLE', True)
+        monkeypatch.setattr(f'{GOOGLE_SERVICE_MODULE}._load_chunk_tokenizer', lambda name: fake_tokenizer)
+        patched_settings.text_chunk_tokenizer = "whitespace"
+        mock_genai.embed_content.side_effect = batch_embedding_response([0.1] * 1536)
+        
+        result = google_service.generate_text_embeddings(text, chunk_size=2)
+        
+        assert len(result) == 3
+        assert mock_genai.embed_content.call_args.kwargs['content'] == ["alpha beta ", "gamma delta ", "epsilon"]
+    
+    def test_chunk_tokenizer_load_failure_is_cached(self, google_service, patched_settings, monkeypatch):
+        """Test a tokenizer that fails to load is tried once and character chunks are used"""
+        from src.services.external_apis.google_service import _load_chunk_tokenizer
+        
+        fake_tokenizer_cls = SimpleNamespace(from_pretrained=Mock(side_effect=OSError("offline")))
+        monkeypatch.setattr(f'{GOOGLE_SERVICE_MODULE}.TOKENIZERS_AVAILABLE', True)
+        monkeypatch.setattr(f'{GOOGLE_SERVICE_MODULE}.Tokenizer', fake_tokenizer_cls, raising=False)
+        patched_settings.text_chunk_tokenizer = "missing-model"
+        _load_chunk_tokenizer.cache_clear()
+        try:
+            assert google_service._split_text("abcdef", chunk_size=3) == ["abc", "def"]
+            assert google_service._split_text("abcdef", chunk_size=3) == ["abc", "def"]
+            assert fake_tokenizer_cls.from_pretrained.call_count == 1
+        finally:
+            _load_chunk_tokenizer.cache_clear()
+    
+    def test_embedding_batch_size_from_settings(self, patched_settings):
+        """Test the embedding batch cap is read from settings"""
+        patched_settings.google_embedding_batch_size = 25
+        
+        service = GoogleService(api_key="test_key")
+        
+        assert service.embedding_batch_size == 25
+    
+    def test_generate_text_embeddings_array(self, google_service, patched_settings, mock_genai, batch_embedding_response):
+        """Test embeddings are available as a float32 array that callers may modify"""
+        patched_settings.text_chunk_size = 10
+        mock_genai.embed_content.side_effect = batch_embedding_response([0.1] * 1536)
+        
+        result = google_service.generate_text_embeddings_array(_LONG_TEXT)
+        
+        assert result.dtype == np.float32
+        assert result.shape == (_LONG_TEXT_CHUNK10, 1536)
+        result[:] = 0.0
+        # Writing to the returned array must not touch the cache
+        assert np.allclose(google_service.generate_text_embeddings_array(_LONG_TEXT), 0.1)
+    
+    def test_generate_text_embeddings_cached(self, google_service, patched_settings, mock_genai, batch_embedding_response):
+        """Test repeated text is served from the embedding cache"""
+        patched_settings.text_chunk_size = 10
+        mock_genai.embed_content.side_effect = batch_embedding_response([0.1] * 1536)
+        
+        first = google_service.generate_text_embeddings(_LONG_TEXT)
+        second = google_service.generate_text_embeddings(_LONG_TEXT)
+        
+        assert first == second
+        assert mock_genai.embed_content.call_count == 1
+        assert len(mock_genai.embed_content.call_args.kwargs['content']) == _LONG_TEXT_CHUNK10
+    
+    def test_generate_text_embeddings_duplicate_chunks(self, google_service, patched_settings, mock_genai, batch_embedding_response):
+        """Test identical chunks within one text are embedded once"""
+        mock_genai.embed_content.side_effect = batch_embedding_response([0.1] * 1536)
+        
+        result = google_service.generate_text_embeddings("abcdeabcde", chunk_size=5)
+        
+        assert len(result) == 2
+        assert mock_genai.embed_content.call_args.kwargs['content'] == ["abcde"]
+    
+    def test_generate_text_embeddings_cache_eviction(self, google_service, mock_genai, batch_embedding_response):
+        """Test least recently used embeddings are evicted once the cache is full"""
+        google_service.embedding_cache_size = 1
+        mock_genai.embed_content.side_effect = batch_embedding_response([0.1] * 1536)
+        
+        google_service.generate_text_embeddings("first")
+        google_service.generate_text_embeddings("second")
+        google_service.generate_text_embeddings("first")
+        
+        assert mock_genai.embed_content.call_count == 3
+    
+    def test_clear_embedding_cache(self, google_service, mock_genai, batch_embedding_response):
+        """Test clearing the cache forces chunks to be embedded again"""
+        mock_genai.embed_content.side_effect = batch_embedding_response([0.1] * 1536)
+        
+        google_service.generate_text_embeddings("Test text")
+        google_service.clear_embedding_cache()
+        google_service.generate_text_embeddings("Test text")
+        
+        assert mock_genai.embed_content.call_count == 2
+    
+    def test_generate_text_embeddings_fallback_not_cached(self, google_service, mock_genai, batch_embedding_response):
+        """Test zero-vector fallbacks are retried instead of cached"""
+        mock_genai.embed_content.side_effect = _API_ERROR
+        google_service.generate_text_embeddings("Test text")
+        
+        mock_genai.embed_content.side_effect = batch_embedding_response([0.1] * 1536)
+        result = google_service.generate_text_embeddings("Test text")
+        
+        assert mock_genai.embed_content.call_count == 2
+        assert any(result[0])
 
 
 class TestAudioTranscription:
     """Test audio transcription functionality"""
     
-    def setup_method(self):
-        """Setup for each test method"""
-        self.service = GoogleService(api_key="test_key")
-        self.service.speech_client = Mock()
-    
-    @patch('src.services.external_apis.google_service.settings')
     @patch('src.services.external_apis.google_service.PYDUB_AVAILABLE', True)
     @patch('src.services.external_apis.google_service.AudioSegment')
-    def test_transcribe_audio_success(self, mock_audio_segment, mock_settings):
+    def test_transcribe_audio_success(self, mock_audio_segment, google_service, make_recognize_response):
         """Test successful audio transcription"""
-        # Mock settings
-        mock_settings.google_speech_language = "en-US"
-        mock_settings.google_speech_model = "latest_long"
-        mock_settings.enable_speaker_diarization = True
-        mock_settings.max_speakers = 6
-        
         # Mock audio processing
         mock_audio = Mock()
         mock_audio.set_channels.return_value = mock_audio
         mock_audio.set_frame_rate.return_value = mock_audio
         mock_audio.set_sample_width.return_value = mock_audio
         
-        mock_buffer = Mock()
-        mock_buffer.getvalue.return_value = b"audio_data"
+        # Export writes into the real in-memory buffer created by the google_service
+        mock_audio.export.side_effect = lambda buffer, format: buffer.write(b"audio_data")
         
-        with patch('io.BytesIO', return_value=mock_buffer):
-            mock_audio_segment.from_file.return_value = mock_audio
-            
-            # Mock speech recognition response
-            mock_word1 = Mock()
-            mock_word1.word = "Hello"
-            mock_word1.start_time.total_seconds.return_value = 0.0
-            mock_word1.end_time.total_seconds.return_value = 0.5
-            mock_word1.confidence = 0.95
-            mock_word1.speaker_tag = 1
-            
-            mock_word2 = Mock()
-            mock_word2.word = "world"
-            mock_word2.start_time.total_seconds.return_value = 0.6
-            mock_word2.end_time.total_seconds.return_value = 1.0
-            mock_word2.confidence = 0.90
-            mock_word2.speaker_tag = 1
-            
-            mock_alternative = Mock()
-            mock_alternative.transcript = "Hello world"
-            mock_alternative.confidence = 0.92
-            mock_alternative.words = [mock_word1, mock_word2]
-            
-            mock_result = Mock()
-            mock_result.alternatives = [mock_alternative]
-            
-            mock_response = Mock()
-            mock_response.results = [mock_result]
-            
-            self.service.speech_client.recognize.return_value = mock_response
-            
-            result = self.service.transcribe_audio("test_audio.mp3")
-            
-            assert result["transcript"] == "Hello world"
-            assert result["confidence"] == 0.92
-            assert "Speaker 1" in result["speakers"]
-            assert len(result["word_details"]) == 2
-            assert result["word_count"] == 2
+        mock_audio_segment.from_file.return_value = mock_audio
+        
+        # Speech recognition response as plain data objects
+        word1 = SimpleNamespace(
+            word="Hello",
+            start_time=SimpleNamespace(total_seconds=lambda: 0.0),
+            end_time=SimpleNamespace(total_seconds=lambda: 0.5),
+            confidence=0.95,
+            speaker_tag=1
+        )
+        word2 = SimpleNamespace(
+            word="world",
+            start_time=SimpleNamespace(total_seconds=lambda: 0.6),
+            end_time=SimpleNamespace(total_seconds=lambda: 1.0),
+            confidence=0.90,
+            speaker_tag=1
+        )
+        google_service.speech_client.recognize.return_value = make_recognize_response("Hello world", 0.92, [word1, word2])
+        
+        result = google_service.transcribe_audio("test_audio.mp3")
+        
+        assert result["transcript"] == "Hello world"
+        assert result["confidence"] == 0.92
+        assert "Speaker 1" in result["speakers"]
+        assert len(result["word_details"]) == 2
+        assert result["word_count"] == 2
+        exported_buffer = mock_audio.export.call_args.args[0]
+        assert isinstance(exported_buffer, io.BytesIO)
+        assert exported_buffer.getvalue() == b"audio_data"
     
     @patch('src.services.external_apis.google_service.PYDUB_AVAILABLE', False)
-    def test_transcribe_audio_without_pydub(self):
+    def test_transcribe_audio_without_pydub(self, google_service, fake_audio_open):
         """Test audio transcription fallback without pydub"""
         mock_response = Mock()
         mock_response.results = []
-        self.service.speech_client.recognize.return_value = mock_response
+        google_service.speech_client.recognize.return_value = mock_response
         
-        with patch('builtins.open', mock_open(read_data=b"raw_audio_data")):
-            result = self.service.transcribe_audio("test_audio.mp3")
+        with patch('builtins.open', fake_audio_open):
+            result = google_service.transcribe_audio("test_audio.mp3")
             
             assert result["transcript"] == ""
             assert result["confidence"] == 0.0
@@ -272,26 +349,20 @@ class TestAudioTranscription:
         with pytest.raises(RuntimeError, match="Google Speech client not initialized"):
             service.transcribe_audio("test_audio.mp3")
     
-    @patch('src.services.external_apis.google_service.settings')
-    def test_transcribe_audio_api_error(self, mock_settings):
+    def test_transcribe_audio_api_error(self, google_service):
         """Test handling of API errors in transcription"""
-        mock_settings.google_speech_language = "en-US"
-        mock_settings.google_speech_model = "latest_long"
-        mock_settings.enable_speaker_diarization = True
-        mock_settings.max_speakers = 6
-        
-        self.service.speech_client.recognize.side_effect = Exception("API Error")
+        google_service.speech_client.recognize.side_effect = _API_ERROR
         
-        with patch.object(self.service, '_prepare_audio_file', return_value=b"audio_data"):
+        with patch.object(google_service, '_prepare_audio_file', return_value=b"audio_data"):
             with pytest.raises(Exception, match="API Error"):
-                self.service.transcribe_audio("test_audio.mp3")
+                google_service.transcribe_audio("test_audio.mp3")
     
-    def test_process_transcription_response_empty(self):
+    def test_process_transcription_response_empty(self, google_service):
         """Test processing empty transcription response"""
         mock_response = Mock()
         mock_response.results = []
         
-        result = self.service._process_transcription_response(mock_response)
+        result = google_service._process_transcription_response(mock_response)
         
         assert result["transcript"] == ""
         assert result["confidence"] == 0.0
@@ -300,32 +371,49 @@ class TestAudioTranscription:
         assert "No transcription results" in result["error"]
 
 
+@pytest.mark.slow
 class TestAsyncOperations:
     """Test async versions of operations"""
     
-    def setup_method(self):
-        """Setup for each test method"""
-        self.service = GoogleService(api_key="test_key")
-    
     @pytest.mark.asyncio
-    async def test_transcribe_audio_async(self):
+    async def test_transcribe_audio_async(self, google_service):
         """Test async audio transcription"""
         mock_result = {"transcript": "async test", "confidence": 0.95}
         
-        with patch.object(self.service, 'transcribe_audio', return_value=mock_result):
-            result = await self.service.transcribe_audio_async("test_audio.mp3")
-            
-            assert result == mock_result
+        calls = []
+        google_service.transcribe_audio = lambda *args: calls.append(args) or mock_result
+        
+        result = await google_service.transcribe_audio_async("test_audio.mp3")
+        
+        assert result == mock_result
+        assert calls == [("test_audio.mp3",)]
     
     @pytest.mark.asyncio
-    async def test_generate_text_embeddings_async(self):
-        """Test async text embedding generation"""
-        mock_result = [[0.1, 0.2, 0.3]]
+    async def test_generate_text_embeddings_async(self, google_service, patched_settings, mock_genai, batch_embedding_response):
+        """Test async text embedding generation sends batches concurrently"""
+        patched_settings.text_chunk_size = 10
+        google_service.embedding_batch_size = 3
+        google_service.max_concurrent_embeddings = 2
+        mock_genai.embed_content.side_effect = batch_embedding_response([0.1] * 1536)
         
-        with patch.object(self.service, 'generate_text_embeddings', return_value=mock_result):
-            result = await self.service.generate_text_embeddings_async("test text")
-            
-            assert result == mock_result
+        result = await google_service.generate_text_embeddings_async(_LONG_TEXT)
+        
+        assert len(result) == _LONG_TEXT_CHUNK10
+        assert all(len(embedding) == 1536 for embedding in result)
+        assert mock_genai.embed_content.call_count == math.ceil(_LONG_TEXT_CHUNK10 / google_service.embedding_batch_size)
+        # Batches are cached, so the sync path returns the same vectors without new calls
+        assert google_service.generate_text_embeddings(_LONG_TEXT) == result
+        assert mock_genai.embed_content.call_count == math.ceil(_LONG_TEXT_CHUNK10 / google_service.embedding_batch_size)
+    
+    @pytest.mark.asyncio
+    async def test_generate_text_embeddings_async_api_error(self, google_service, mock_genai):
+        """Test failed batches fall back to zero vectors in the async path"""
+        mock_genai.embed_content.side_effect = _API_ERROR
+        
+        result = await google_service.generate_text_embeddings_async("Test text")
+        
+        assert len(result) == 1
+        assert not any(result[0])
 
 
 class TestServiceStatus:
@@ -390,24 +478,113 @@ class TestServiceStatus:
 class TestRateLimiting:
     """Test rate limiting functionality"""
     
-    def test_rate_limiting(self):
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """Virtual clock: sleeping advances time instead of blocking the test"""
+        clock = [1000.0]
+        fake_time = SimpleNamespace(
+            monotonic=lambda: clock[0],
+            sleep=lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+        )
+        monkeypatch.setattr(f'{GOOGLE_SERVICE_MODULE}.time', fake_time)
+        return clock
+    
+    def test_rate_limiting(self, clock):
         """Test rate limiting mechanism"""
-        service = GoogleService(api_key="test_key")
-        service.min_request_interval = 0.1
-        
-        start_time = time.time()
+        service = GoogleService(api_key="test_key", rate_per_sec=10, burst=1)
         
         # First request
         service._rate_limit()
-        first_time = time.time()
+        first_time = clock[0]
         
         # Second request immediately
         service._rate_limit()
-        second_time = time.time()
+        second_time = clock[0]
         
-        # Should have waited at least min_request_interval
+        # Should have waited for the bucket to refill one token
         time_diff = second_time - first_time
-        assert time_diff >= service.min_request_interval
+        assert time_diff == pytest.approx(0.1)
+    
+    def test_rate_limiting_allows_burst(self, clock):
+        """Test requests within the burst size proceed without waiting"""
+        service = GoogleService(api_key="test_key", rate_per_sec=10, burst=3)
+        start = clock[0]
+        
+        for _ in range(3):
+            service._rate_limit()
+        assert clock[0] == start
+        
+        # The bucket is empty now, so the next request waits for a refill
+        service._rate_limit()
+        assert clock[0] - start == pytest.approx(0.1)
+
+
+class TestSemanticCache:
+    """Test the cosine-similarity cache of embedding-keyed values"""
+    
+    def test_put_and_get(self):
+        """Test a cached value is returned for a near-identical query"""
+        cache = SemanticCache()
+        cache.put([1.0, 0.0, 0.0], "first")
+        cache.put([0.0, 1.0, 0.0], "second")
+        
+        hits = cache.get([0.99, 0.01, 0.0])
+        assert [value for value, _ in hits] == ["first"]
+        assert hits[0][1] == pytest.approx(1.0, abs=1e-3)
+        assert cache.M.dtype == np.float32
+    
+    def test_get_below_threshold(self):
+        """Test queries not similar enough to any entry miss"""
+        cache = SemanticCache(threshold=0.95)
+        cache.put([1.0, 0.0], "first")
+        
+        assert cache.get([1.0, 1.0]) == []
+        assert SemanticCache().get([1.0, 0.0]) == []
+    
+    def test_put_replaces_near_duplicate(self):
+        """Test putting a near-duplicate embedding updates the existing row"""
+        cache = SemanticCache()
+        first = cache.put([1.0, 0.0], "old")
+        second = cache.put([2.0, 0.01], "new")
+        
+        assert first == second == 0
+        assert len(cache) == 1
+        assert cache.get([1.0, 0.0]) == [("new", pytest.approx(1.0, abs=1e-3))]
+    
+    def test_get_top_k_ordered(self):
+        """Test up to k hits are returned most similar first"""
+        cache = SemanticCache(threshold=0.2, initial_capacity=2)
+        for i, embedding in enumerate(np.vstack([np.eye(3), -np.eye(3)[:1]])):
+            cache.put(embedding, i)
+        
+        assert len(cache) == 4
+        hits = cache.get([0.8, 0.5, 0.3], k=3)
+        assert [value for value, _ in hits] == [0, 1, 2]
+        assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+    
+    def test_zero_embedding_rejected(self):
+        """Test a zero vector cannot be normalized"""
+        with pytest.raises(ValueError, match="zero embedding"):
+            SemanticCache().put([0.0, 0.0], "value")
+    
+    def test_initial_capacity_validated(self):
+        """Test a capacity that could never grow is rejected up front"""
+        with pytest.raises(ValueError, match="initial_capacity"):
+            SemanticCache(initial_capacity=0)
+        
+        cache = SemanticCache(initial_capacity=1)
+        cache.put([1.0, 0.0], "first")
+        cache.put([0.0, 1.0], "second")
+        assert len(cache) == 2
+    
+    def test_clear(self):
+        """Test clearing drops every entry"""
+        cache = SemanticCache()
+        cache.put([1.0, 0.0], "first")
+        cache.clear()
+        
+        assert len(cache) == 0
+        assert cache.get([1.0, 0.0]) == []
 
 
 class TestGlobalInstance:
@@ -419,78 +596,73 @@ class TestGlobalInstance:
         service = get_google_service(api_key="test_key")
         assert service is not None
     
-    @patch.dict(os.environ, {'GOOGLE_API_KEY': 'test_env_key'})
-    def test_global_instance_api_key_from_env(self):
+    def test_global_instance_cached_per_api_key(self):
+        """Test one instance is kept per API key"""
+        from src.services.external_apis.google_service import _build_google_service, get_google_service
+        
+        _build_google_service.cache_clear()
+        try:
+            first = get_google_service(api_key="key_a")
+            second = get_google_service(api_key="key_b")
+            assert get_google_service(api_key="key_a") is first
+            assert get_google_service("key_b") is second
+            assert first is not second
+            assert get_google_service() is get_google_service(api_key=None)
+        finally:
+            _build_google_service.cache_clear()
+    
+    def test_global_instance_api_key_from_env(self, monkeypatch):
         """Test global instance uses environment variable"""
-        # Reset the global instance first
-        import src.services.external_apis.google_service as gs
-        gs.google_service = None
-        
         from src.services.external_apis.google_service import get_google_service
-        service = get_google_service()
-        assert service.api_key == "test_env_key"
+        
+        # Drop any cached instance so the environment is read again
+        get_google_service.cache_clear()
+        monkeypatch.setenv('GOOGLE_API_KEY', 'test_env_key')
+        try:
+            service = get_google_service()
+            assert service.api_key == "test_env_key"
+        finally:
+            get_google_service.cache_clear()
 
 
 class TestIntegrationScenarios:
     """Integration test scenarios"""
     
-    @patch('src.services.external_apis.google_service.genai')
-    @patch('src.services.external_apis.google_service.settings')
-    def test_healthcare_document_embedding(self, mock_settings, mock_genai):
+    def test_healthcare_document_embedding(self, patched_settings, mock_genai):
         """Test embedding healthcare document text"""
-        mock_settings.text_embedding_dimension = 1536
-        mock_settings.text_chunk_size = 1000
-        mock_settings.google_embedding_model = "text-embedding-3-small"
+        patched_settings.google_embedding_model = "text-embedding-3-small"
         
         # Mock API response
         mock_genai.embed_content.return_value = {
-            'embedding': [0.1] * 1536
+            'embedding': [[0.1] * 1536]
         }
         
-        medical_text = "Patient diagnosed with hypertension. Prescribed medication X."
-        
         service = GoogleService(api_key="test_key")
         service.genai_configured = True
         
-        result = service.generate_text_embeddings(medical_text)
+        result = service.generate_text_embeddings(_MEDICAL_TEXT)
         
         assert len(result) == 1
         assert len(result[0]) == 1536
-        mock_genai.embed_content.assert_called_once_with(
-            model="text-embedding-3-small",
-            content=medical_text,
-            task_type="retrieval_document"
-        )
+        assert mock_genai.embed_content.call_count == 1
+        assert mock_genai.embed_content.call_args.kwargs == {
+            "model": "text-embedding-3-small",
+            "content": [_MEDICAL_TEXT],
+            "task_type": "retrieval_document"
+        }
     
-    @patch('src.services.external_apis.google_service.settings')
-    def test_university_lecture_transcription(self, mock_settings):
+    def test_university_lecture_transcription(self, make_recognize_response):
         """Test transcription of university lecture audio"""
-        mock_settings.google_speech_language = "en-US"
-        mock_settings.google_speech_model = "latest_long"
-        mock_settings.enable_speaker_diarization = True
-        mock_settings.max_speakers = 6
-        
         service = GoogleService(api_key="test_key")
         service.speech_client = Mock()
         
         # Mock lecture transcription
-        mock_alternative = Mock()
-        mock_alternative.transcript = "Today we will discuss machine learning algorithms and their applications"
-        mock_alternative.confidence = 0.95
-        mock_alternative.words = []
-        
-        mock_result = Mock()
-        mock_result.alternatives = [mock_alternative]
-        
-        mock_response = Mock()
-        mock_response.results = [mock_result]
-        
-        service.speech_client.recognize.return_value = mock_response
+        service.speech_client.recognize.return_value = make_recognize_response(_LECTURE_TRANSCRIPT, 0.95)
         
         with patch.object(service, '_prepare_audio_file', return_value=b"lecture_audio"):
             result = service.transcribe_audio("lecture.mp3")
             
-        assert result["transcript"] == "Today we will discuss machine learning algorithms and their applications"
+        assert result["transcript"] == _LECTURE_TRANSCRIPT
         assert result["confidence"] == 0.95
         assert result["word_count"] == 10  # Number of words in the transcript
 
@@ -1,29 +1,30 @@
 #!/usr/bin/env python3
 
 import pytest
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.database.milvus_db import MilvusVectorDatabase
 import json
-import random
+
+import numpy as np
+
+# Seeded so failing vector tests are reproducible
+_RNG = np.random.default_rng(42)
 
 def generate_dummy_vector(dim: int) -> list:
     """Generate random vector for testing"""
-    return [random.random() for _ in range(dim)]
+    return _RNG.random(dim, dtype=np.float32).tolist()
 
-@pytest.fixture
-def db():
-    """Database fixture for tests"""
-    database = MilvusVectorDatabase()
+@pytest.fixture(scope="module")
+def db(milvus_lite_uri):
+    """Database fixture shared by the module so the connection is made once"""
+    database = MilvusVectorDatabase(lite_uri=milvus_lite_uri)
     if database.connect():
         yield database
         database.disconnect()
     else:
         pytest.skip("Milvus not available")
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def db_with_collections(db):
     """Database fixture with collections created"""
     if db.create_all_collections():
@@ -31,21 +32,55 @@ def db_with_collections(db):
     else:
         pytest.skip("Failed to create collections")
 
+@pytest.fixture(scope="module")
+def seeded_documents(db_with_collections):
+    """Insert a small corpus across two departments with one batch insert, once per module
+
+    Returns (doc_ids, vectors); row i has content_hash "seed<i>".
+    """
+    departments = ["cardiology", "emergency"] * 6
+    vectors = [generate_dummy_vector(1536) for _ in departments]
+    metadatas = [
+        {
+            "organizational": {"department": department, "role": "physician"},
+            "content": {"title": f"Protocol {i}", "author": "Dr. Test"}
+        }
+        for i, department in enumerate(departments)
+    ]
+    doc_ids = db_with_collections.insert_data_batch(
+        collection_name="documents",
+        vectors=vectors,
+        metadatas=metadatas,
+        content_types=["protocol"] * len(departments),
+        departments=departments,
+        file_sizes=[15000] * len(departments),
+        content_hashes=[f"seed{i}" for i in range(len(departments))]
+    )
+    assert len(doc_ids) == len(departments)
+    yield doc_ids, vectors
+    db_with_collections.delete_by_expr("documents", 'content_hash like "seed%"')
+
+@pytest.fixture(autouse=True)
+def clean_documents(request):
+    """Remove rows inserted by a test, keeping the seeded corpus, so the shared database stays isolated"""
+    if "db_with_collections" not in request.fixturenames:
+        yield
+        return
+    seeded_ids, _ = request.getfixturevalue("seeded_documents")
+    yield
+    request.getfixturevalue("db_with_collections").delete_by_expr(
+        "documents", f"id not in {json.dumps(seeded_ids)}"
+    )
+
 class TestMilvusDatabase:
     """Test class for Milvus Database functionality"""
     
-    def test_connection(self):
+    def test_connection(self, db):
         """Test database connection"""
-        db = MilvusVectorDatabase()
-        success = db.connect()
-        
-        if success:
-            assert db.is_connected
-            assert db.health_check()
-            db.disconnect()
-            assert not db.is_connected
-        else:
-            pytest.skip("Milvus not available for testing")
+        # The shared connection is left open: disconnecting would drop the
+        # "default" alias that the module's other fixtures rely on
+        assert db.is_connected
+        assert db.health_check()
     
     def test_collection_creation(self, db):
         """Test collection creation"""
@@ -106,74 +141,53 @@ class TestMilvusDatabase:
         assert isinstance(doc_id, str)
         assert len(doc_id) > 0
     
-    def test_vector_search(self, db_with_collections):
-        """Test vector similarity search"""
-        text_metadata = {
-            "organizational": {
-                "department": "cardiology",
-                "role": "physician"
-            },
-            "content": {
-                "title": "Test Document",
-                "author": "Dr. Test"
-            }
-        }
+    def test_data_batch_insertion(self, db_with_collections, seeded_documents):
+        """Test inserting many rows in one batch"""
+        doc_ids, _ = seeded_documents
+        assert len(set(doc_ids)) == len(doc_ids)
         
-        text_vector = generate_dummy_vector(1536)
-        doc_id = db_with_collections.insert_data(
+        results = db_with_collections.metadata_search(
+            "documents",
+            'content_hash like "seed%"',
+            limit=20
+        )
+        assert sorted(result["id"] for result in results) == sorted(doc_ids)
+    
+    def test_data_batch_insertion_mismatched_columns(self, db_with_collections):
+        """Test batch insertion rejects columns of different lengths"""
+        doc_ids = db_with_collections.insert_data_batch(
             collection_name="documents",
-            vector=text_vector,
-            metadata=text_metadata,
-            content_type="protocol",
-            department="cardiology",
-            file_size=15000,
-            content_hash="test123"
+            vectors=[generate_dummy_vector(1536)] * 2,
+            metadatas=[{}],
+            content_types=["protocol"] * 2,
+            departments=["cardiology"] * 2,
+            file_sizes=[15000] * 2,
+            content_hashes=["a", "b"]
         )
-        
-        assert doc_id is not None
-        
-        query_vector = generate_dummy_vector(1536)
+        assert doc_ids == []
+    
+    def test_vector_search(self, db_with_collections, seeded_documents):
+        """Test vector similarity search"""
+        doc_ids, vectors = seeded_documents
         results = db_with_collections.vector_search(
             "documents", 
-            query_vector, 
+            vectors[3], 
             limit=5
         )
         
         assert isinstance(results, list)
-        if len(results) > 0:
-            result = results[0]
-            assert "id" in result
-            assert "score" in result
-            assert "metadata" in result
-            assert "content_type" in result
-            assert "department" in result
+        assert len(results) > 0
+        result = results[0]
+        assert "id" in result
+        assert "score" in result
+        assert "metadata" in result
+        assert "content_type" in result
+        assert "department" in result
+        assert result["id"] == doc_ids[3]
+        assert result["department"] == "emergency"
     
-    def test_metadata_search(self, db_with_collections):
+    def test_metadata_search(self, db_with_collections, seeded_documents):
         """Test metadata-based search"""
-        text_metadata = {
-            "organizational": {
-                "department": "emergency",
-                "role": "physician"
-            },
-            "content": {
-                "title": "Emergency Protocol",
-                "author": "Dr. Emergency"
-            }
-        }
-        
-        text_vector = generate_dummy_vector(1536)
-        doc_id = db_with_collections.insert_data(
-            collection_name="documents",
-            vector=text_vector,
-            metadata=text_metadata,
-            content_type="protocol",
-            department="emergency",
-            file_size=15000,
-            content_hash="emergency123"
-        )
-        
-        assert doc_id is not None
-        
         results = db_with_collections.metadata_search(
             "documents",
             'department == "emergency"',
@@ -181,9 +195,27 @@ class TestMilvusDatabase:
         )
         
         assert isinstance(results, list)
-        if len(results) > 0:
-            result = results[0]
+        assert len(results) == 5
+        for result in results:
             assert result["department"] == "emergency"
+    
+    def test_delete_by_expr(self, db_with_collections):
+        """Test deleting rows by filter expression"""
+        doc_id = db_with_collections.insert_data(
+            collection_name="documents",
+            vector=generate_dummy_vector(1536),
+            metadata={"organizational": {"department": "radiology"}},
+            content_type="report",
+            department="radiology",
+            file_size=1000,
+            content_hash="delete123"
+        )
+        assert doc_id is not None
+        
+        assert db_with_collections.delete_by_expr("documents", 'content_hash == "delete123"')
+        
+        results = db_with_collections.metadata_search("documents", 'department == "radiology"', limit=5)
+        assert results == []
 
 def test_database_configuration():
     """Test database configuration without connection"""
@@ -1,9 +1,6 @@
 #!/usr/bin/env python3
 
 import pytest
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.database.milvus_db import MilvusVectorDatabase
 from src.database.config import (
@@ -14,138 +11,163 @@ from src.database.config import (
 )
 from datetime import datetime
 import json
-import random
 from typing import List
 
+import numpy as np
+
+# Seeded so failing vector tests are reproducible
+_RNG = np.random.default_rng(0)
+
 def generate_dummy_vector(dim: int) -> List[float]:
     """Generate random vector for testing"""
-    return [random.random() for _ in range(dim)]
+    return _RNG.random(dim, dtype=np.float32).tolist()
 
-@pytest.fixture
-def db():
-    """Database fixture for tests"""
-    database = MilvusVectorDatabase()
-    if database.connect():
-        yield database
-        database.disconnect()
-    else:
+@pytest.fixture(scope="module")
+def db(request, milvus_lite_uri):
+    """Database fixture shared by the module so the connection is made once"""
+    database = MilvusVectorDatabase(lite_uri=milvus_lite_uri)
+    if not database.connect():
         pytest.skip("Milvus not available")
+    request.addfinalizer(database.disconnect)
+    return database
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def db_with_collections(db):
-    """Database fixture with collections created"""
+    """Database fixture with collections created once; tests isolate rows by content_hash"""
     if db.create_all_collections():
         return db
     else:
         pytest.skip("Failed to create collections")
 
-@pytest.fixture
+# Trusted, hard-coded test data: skip validation of the nested models.
+# Built once at import and shared by every test, so tests must not mutate them.
+_HEALTHCARE_DOC = DocumentMetadata.model_construct(
+    organizational=OrganizationalMetadata.model_construct(
+        department="emergency_medicine",
+        role="attending_physician",
+        organization_type=OrganizationTypeEnum.HEALTHCARE,
+        project_id="emergency_protocols_2024",
+        security_level=SecurityLevelEnum.CONFIDENTIAL,
+        access_groups=["doctors", "nurses", "emergency_staff"]
+    ),
+    content=ContentMetadata.model_construct(
+        title="Test Emergency Protocol",
+        author="Dr. Test",
+        content_type=ContentTypeEnum.DOCUMENT,
+        format="pdf",
+        creation_date=datetime.now(),
+        version="1.0",
+        language="en",
+        tags=["emergency", "protocol", "test"],
+        keywords=["emergency", "protocol", "testing"]
+    ),
+    processing=ProcessingMetadata.model_construct(
+        api_used="openai_gpt4",
+        confidence_score=0.95,
+        model_version="gpt-4-turbo",
+        processing_duration=10.0
+    ),
+    domain_specific=DomainSpecificMetadata.model_construct(
+        specialty="emergency_medicine",
+        subject_area="protocols",
+        priority="high",
+        status="approved",
+        related_entities=["test_cases"],
+        custom_fields={"test": True}
+    ),
+    compliance=ComplianceMetadata.model_construct(
+        compliance_frameworks=["HIPAA"],
+        retention_date=datetime(2030, 12, 31),
+        approved_by="Test Administrator",
+        review_date=datetime(2025, 6, 15),
+        anonymized=True
+    )
+)
+
+@pytest.fixture(scope="module")
 def healthcare_document() -> DocumentMetadata:
-    """Create a healthcare document for testing"""
-    return DocumentMetadata(
-        organizational=OrganizationalMetadata(
-            department="emergency_medicine",
-            role="attending_physician",
-            organization_type=OrganizationTypeEnum.HEALTHCARE,
-            project_id="emergency_protocols_2024",
-            security_level=SecurityLevelEnum.CONFIDENTIAL,
-            access_groups=["doctors", "nurses", "emergency_staff"]
-        ),
-        content=ContentMetadata(
-            title="Test Emergency Protocol",
-            author="Dr. Test",
-            content_type=ContentTypeEnum.DOCUMENT,
-            format="pdf",
-            creation_date=datetime.now(),
-            version="1.0",
-            language="en",
-            tags=["emergency", "protocol", "test"],
-            keywords=["emergency", "protocol", "testing"]
-        ),
-        processing=ProcessingMetadata(
-            api_used="openai_gpt4",
-            confidence_score=0.95,
-            model_version="gpt-4-turbo",
-            processing_duration=10.0
-        ),
-        domain_specific=DomainSpecificMetadata(
-            specialty="emergency_medicine",
-            subject_area="protocols",
-            priority="high",
-            status="approved",
-            related_entities=["test_cases"],
-            custom_fields={"test": True}
-        ),
-        compliance=ComplianceMetadata(
-            compliance_frameworks=["HIPAA"],
-            retention_date=datetime(2030, 12, 31),
-            approved_by="Test Administrator",
-            review_date=datetime(2025, 6, 15),
-            anonymized=True
-        )
+    """Shared healthcare document for testing"""
+    return _HEALTHCARE_DOC
+
+_UNIVERSITY_DOC = DocumentMetadata.model_construct(
+    organizational=OrganizationalMetadata.model_construct(
+        department="computer_science",
+        role="professor",
+        organization_type=OrganizationTypeEnum.UNIVERSITY,
+        project_id="ai_research_2024",
+        security_level=SecurityLevelEnum.INTERNAL,
+        access_groups=["faculty", "students"]
+    ),
+    content=ContentMetadata.model_construct(
+        title="Test AI Research Paper",
+        author="Prof. Test",
+        content_type=ContentTypeEnum.DOCUMENT,
+        format="pdf",
+        creation_date=datetime.now(),
+        version="1.0",
+        language="en",
+        tags=["ai", "research", "test"],
+        keywords=["artificial intelligence", "research", "testing"]
+    ),
+    processing=ProcessingMetadata.model_construct(
+        api_used="openai_embeddings",
+        confidence_score=0.92,
+        model_version="text-embedding-3-large",
+        processing_duration=5.0
+    ),
+    domain_specific=DomainSpecificMetadata.model_construct(
+        specialty="computer_science",
+        subject_area="artificial_intelligence",
+        priority="medium",
+        status="published",
+        related_entities=["research_papers"],
+        custom_fields={"test": True}
+    ),
+    compliance=ComplianceMetadata.model_construct(
+        compliance_frameworks=["FERPA"],
+        retention_date=datetime(2030, 12, 31),
+        approved_by="Department Head",
+        review_date=datetime(2025, 8, 1),
+        anonymized=False
     )
+)
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def university_document() -> DocumentMetadata:
-    """Create a university document for testing"""
-    return DocumentMetadata(
-        organizational=OrganizationalMetadata(
-            department="computer_science",
-            role="professor",
-            organization_type=OrganizationTypeEnum.UNIVERSITY,
-            project_id="ai_research_2024",
-            security_level=SecurityLevelEnum.INTERNAL,
-            access_groups=["faculty", "students"]
-        ),
-        content=ContentMetadata(
-            title="Test AI Research Paper",
-            author="Prof. Test",
-            content_type=ContentTypeEnum.DOCUMENT,
-            format="pdf",
-            creation_date=datetime.now(),
-            version="1.0",
-            language="en",
-            tags=["ai", "research", "test"],
-            keywords=["artificial intelligence", "research", "testing"]
-        ),
-        processing=ProcessingMetadata(
-            api_used="openai_embeddings",
-            confidence_score=0.92,
-            model_version="text-embedding-3-large",
-            processing_duration=5.0
-        ),
-        domain_specific=DomainSpecificMetadata(
-            specialty="computer_science",
-            subject_area="artificial_intelligence",
-            priority="medium",
-            status="published",
-            related_entities=["research_papers"],
-            custom_fields={"test": True}
-        ),
-        compliance=ComplianceMetadata(
-            compliance_frameworks=["FERPA"],
-            retention_date=datetime(2030, 12, 31),
-            approved_by="Department Head",
-            review_date=datetime(2025, 8, 1),
-            anonymized=False
-        )
+    """Shared university document for testing"""
+    return _UNIVERSITY_DOC
+
+SEED_COUNT = 10
+
+@pytest.fixture(scope="module")
+def seeded_docs(db_with_collections, healthcare_document, university_document):
+    """Insert alternating healthcare/university documents with one batch insert
+
+    Returns (doc_ids, vectors) indexed by seed number; row i has content_hash "seed_i".
+    """
+    # One (SEED_COUNT, 1536) draw instead of a generator call per row
+    vectors = _RNG.random((SEED_COUNT, 1536), dtype=np.float32).tolist()
+    metadatas = [healthcare_document if i % 2 == 0 else university_document for i in range(SEED_COUNT)]
+    doc_ids = db_with_collections.insert_documents_batch(
+        collection_name="documents",
+        vectors=vectors,
+        metadatas=metadatas,
+        content_hashes=[f"seed_{i}" for i in range(SEED_COUNT)],
+        file_sizes=[45000 if i % 2 == 0 else 32000 for i in range(SEED_COUNT)]
     )
+    assert len(doc_ids) == SEED_COUNT
+    yield doc_ids, vectors
+    db_with_collections.delete_by_expr("documents", f"id in {json.dumps(doc_ids)}")
 
 class TestPydanticMilvusDatabase:
     """Test class for Pydantic-based Milvus Database functionality"""
     
-    def test_connection(self):
+    def test_connection(self, db):
         """Test database connection"""
-        db = MilvusVectorDatabase()
-        success = db.connect()
-        
-        if success:
-            assert db.is_connected
-            assert db.health_check()
-            db.disconnect()
-            assert not db.is_connected
-        else:
-            pytest.skip("Milvus not available for testing")
+        # The shared connection is left open: disconnecting would drop the
+        # "default" alias that the module's other fixtures rely on
+        assert db.is_connected
+        assert db.health_check()
     
     def test_collection_creation(self, db):
         """Test collection creation"""
@@ -161,6 +183,11 @@ class TestPydanticMilvusDatabase:
         assert "audio_recordings" in available_collections
         assert "video_content" in available_collections
     
+    def test_fixture_documents_are_valid(self, healthcare_document, university_document):
+        """Test the unvalidated fixture documents survive full validation unchanged"""
+        for document in (healthcare_document, university_document):
+            assert DocumentMetadata.model_validate(document.model_dump()) == document
+    
     def test_pydantic_document_insertion(self, db_with_collections, healthcare_document):
         """Test inserting a Pydantic document"""
         vector = generate_dummy_vector(1536)
@@ -177,30 +204,43 @@ class TestPydanticMilvusDatabase:
         assert isinstance(doc_id, str)
         assert len(doc_id) > 0
     
-    def test_pydantic_metadata_search(self, db_with_collections, healthcare_document):
-        """Test searching with Pydantic metadata"""
-        vector = generate_dummy_vector(1536)
+    def test_pydantic_documents_batch_insertion(self, db_with_collections, seeded_docs):
+        """Test batch-inserted documents are stored with their structured fields"""
+        doc_ids, _ = seeded_docs
         
-        # Insert document
-        doc_id = db_with_collections.insert_document(
+        assert len(set(doc_ids)) == SEED_COUNT
+        results = db_with_collections.metadata_search(
+            "documents",
+            'content_hash == "seed_1"',
+            limit=5
+        )
+        assert [result["id"] for result in results] == [doc_ids[1]]
+        assert results[0]["department"] == "computer_science"
+        assert results[0]["role"] == "professor"
+    
+    def test_pydantic_documents_batch_mismatched_columns(self, db_with_collections, healthcare_document):
+        """Test batch insert rejects columns of different lengths"""
+        doc_ids = db_with_collections.insert_documents_batch(
             collection_name="documents",
-            vector=vector,
-            metadata=healthcare_document,
-            file_size=45000,
-            content_hash="test_hash_search_pydantic"
+            vectors=[generate_dummy_vector(1536)] * 2,
+            metadatas=[healthcare_document],
+            content_hashes=["test_hash_mismatch_0", "test_hash_mismatch_1"],
+            file_sizes=[45000, 45000]
         )
         
-        assert doc_id is not None
-        
+        assert doc_ids == []
+    
+    def test_pydantic_metadata_search(self, db_with_collections, seeded_docs):
+        """Test searching with Pydantic metadata"""
         # Search by content hash to ensure we get our specific document
         results = db_with_collections.metadata_search(
             "documents",
-            'content_hash == "test_hash_search_pydantic"',
+            'content_hash == "seed_0"',
             limit=5
         )
         
         assert isinstance(results, list)
-        assert len(results) > 0, "Should find the document we just inserted"
+        assert len(results) > 0, "Should find the seeded document"
         
         result = results[0]
         assert "metadata" in result
@@ -208,25 +248,14 @@ class TestPydanticMilvusDatabase:
         assert "organizational" in result["metadata"], "Should have organizational metadata"
         assert result["metadata"]["organizational"]["organization_type"] == "healthcare"
     
-    def test_pydantic_vector_search(self, db_with_collections, university_document):
+    def test_pydantic_vector_search(self, db_with_collections, seeded_docs):
         """Test vector search with Pydantic document"""
-        vector = generate_dummy_vector(1536)
+        doc_ids, vectors = seeded_docs
         
-        # Insert document
-        doc_id = db_with_collections.insert_document(
-            collection_name="documents",
-            vector=vector,
-            metadata=university_document,
-            file_size=32000,
-            content_hash="test_hash_vector_pydantic"
-        )
-        
-        assert doc_id is not None
-        
-        # Perform vector search using the same vector for exact match
+        # Perform vector search using a seeded university vector for an exact match
         results = db_with_collections.vector_search(
             "documents",
-            vector,  # Use same vector for higher similarity
+            vectors[1],
             limit=3
         )
         
@@ -238,31 +267,17 @@ class TestPydanticMilvusDatabase:
         assert "id" in result
         assert "score" in result
         assert "metadata" in result
-        
-        # Check if metadata has the expected structure
-        if isinstance(result["metadata"], dict) and "organizational" in result["metadata"]:
-            org_type = result["metadata"]["organizational"]["organization_type"]
-            assert org_type in ["university", "healthcare"], f"Expected university or healthcare, got {org_type}"
+        assert result["id"] == doc_ids[1]
+        assert result["metadata"]["organizational"]["organization_type"] == "university"
     
-    def test_pydantic_hybrid_search(self, db_with_collections, healthcare_document):
+    def test_pydantic_hybrid_search(self, db_with_collections, seeded_docs):
         """Test hybrid search with Pydantic document"""
-        vector = generate_dummy_vector(1536)
-        
-        # Insert document
-        doc_id = db_with_collections.insert_document(
-            collection_name="documents",
-            vector=vector,
-            metadata=healthcare_document,
-            file_size=45000,
-            content_hash="test_hash_hybrid_pydantic"
-        )
-        
-        assert doc_id is not None
+        _, vectors = seeded_docs
         
         # Perform hybrid search with organization type filter
         results = db_with_collections.hybrid_search(
             "documents",
-            vector,  # Use same vector for higher similarity
+            vectors[0],  # Seeded healthcare vector for higher similarity
             metadata_filter='organization_type == "healthcare"',
             limit=3
         )
@@ -273,9 +288,11 @@ class TestPydanticMilvusDatabase:
         # Check that we found a healthcare document
         found_healthcare = False
         for result in results:
-            if (isinstance(result["metadata"], dict) and 
-                "organizational" in result["metadata"] and
-                result["metadata"]["organizational"]["organization_type"] == "healthcare"):
+            try:
+                organization_type = result["metadata"]["organizational"]["organization_type"]
+            except (TypeError, KeyError):
+                continue
+            if organization_type == "healthcare":
                 found_healthcare = True
                 break
         
@@ -4,19 +4,34 @@ Text Workflow Tests
 pytest-compatible test suite for text workflow functionality.
 """
 
-import os
-import sys
 import pytest
-import tempfile
 from pathlib import Path
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
-
 from src.services.workflows.text_workflow import TextWorkflow
 from src.services.workflow_base import WorkflowInput, WorkflowOutput
 
 
+# Pre-encoded file contents for the process() tests
+_WORKFLOW_INPUT_BYTES = """
+This is a sample document for testing the text workflow system.
+It contains multiple sentences and paragraphs for comprehensive testing.
+
+Healthcare terms: patient, diagnosis, treatment, medication, doctor, hospital.
+Academic terms: research, analysis, publication, methodology, hypothesis.
+
+Key findings:
+- The system processes text files successfully
+- Embeddings are generated for semantic search
+- Keywords are extracted automatically
+- Content is structured for database storage
+
+This document demonstrates the capabilities of the multimodal AI system
+designed for healthcare and university environments.
+""".encode()
+_UNICODE_BYTES = "Unicode test: café, naïve, résumé, 中文, العربية, 🎉".encode('utf-8')
+_LARGE_BYTES = ("This is a test sentence. " * 1000).encode()  # ~25KB content
+
+
 class MockFileMetadata:
     """Mock file metadata for testing"""
     def __init__(self):
@@ -35,9 +50,9 @@ class MockFileMetadata:
         return self.__dict__
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def text_workflow():
-    """Create TextWorkflow instance"""
+    """TextWorkflow instance shared by the session; it holds no per-test state"""
     return TextWorkflow()
 
 
@@ -47,7 +62,7 @@ def mock_file_metadata():
     return MockFileMetadata()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_text_content():
     """Sample text content for testing"""
     return """
@@ -71,41 +86,38 @@ embedding generation works correctly with longer text content.
 """
 
 
-@pytest.fixture
-def workflow_input(mock_file_metadata):
-    """Create WorkflowInput with temporary file"""
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-        f.write("""
-This is a sample document for testing the text workflow system.
-It contains multiple sentences and paragraphs for comprehensive testing.
-
-Healthcare terms: patient, diagnosis, treatment, medication, doctor, hospital.
-Academic terms: research, analysis, publication, methodology, hypothesis.
+@pytest.fixture(scope="session")
+def sample_embeddings(text_workflow, sample_text_content):
+    """Embeddings of the sample text, generated once for the session"""
+    return text_workflow._generate_embeddings(sample_text_content)
 
-Key findings:
-- The system processes text files successfully
-- Embeddings are generated for semantic search
-- Keywords are extracted automatically
-- Content is structured for database storage
 
-This document demonstrates the capabilities of the multimodal AI system
-designed for healthcare and university environments.
-""")
-        temp_file_path = f.name
+@pytest.fixture(scope="module")
+def make_temp_file(tmp_path_factory):
+    """Factory writing each distinct content to one .txt file, shared by the module's tests"""
+    temp_dir = tmp_path_factory.mktemp("text_workflow")
+    paths = {}
+    
+    def _make(data: bytes) -> str:
+        if data not in paths:
+            path = temp_dir / f"content_{len(paths)}.txt"
+            path.write_bytes(data)
+            paths[data] = str(path)
+        return paths[data]
     
-    workflow_input = WorkflowInput(
+    return _make
+
+
+@pytest.fixture
+def workflow_input(mock_file_metadata, make_temp_file):
+    """Create WorkflowInput for the sample document"""
+    return WorkflowInput(
         file_id="test_file_001",
-        file_path=temp_file_path,
+        file_path=make_temp_file(_WORKFLOW_INPUT_BYTES),
         filename="test_document.txt",
         mime_type="text/plain",
         file_metadata=mock_file_metadata
     )
-    
-    yield workflow_input
-    
-    # Cleanup
-    if os.path.exists(temp_file_path):
-        os.unlink(temp_file_path)
 
 
 class TestTextWorkflow:
@@ -163,30 +175,30 @@ class TestTextWorkflow:
         assert result.structured_data == {}
         assert result.embeddings == []
     
-    def test_process_empty_file(self, text_workflow, mock_file_metadata):
-        """Test processing with empty file"""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-            f.write("")  # Empty file
-            temp_file_path = f.name
+    @pytest.mark.parametrize("data,expected_chunks", [
+        (_WORKFLOW_INPUT_BYTES, -(-len(_WORKFLOW_INPUT_BYTES.decode()) // 500)),
+        (b"", 0),
+        (_UNICODE_BYTES, 1),
+        (_LARGE_BYTES, 50),
+    ], ids=["sample", "empty", "unicode", "large"])
+    def test_process_file_contents(self, text_workflow, mock_file_metadata, make_temp_file, data, expected_chunks):
+        """Test processing files of different content and size"""
+        content = data.decode('utf-8')
+        workflow_input = WorkflowInput(
+            file_id="test_file_003",
+            file_path=make_temp_file(data),
+            filename="content.txt",
+            mime_type="text/plain",
+            file_metadata=mock_file_metadata
+        )
+        
+        result = text_workflow.process(workflow_input)
         
-        try:
-            workflow_input = WorkflowInput(
-                file_id="test_file_003",
-                file_path=temp_file_path,
-                filename="empty.txt",
-                mime_type="text/plain",
-                file_metadata=mock_file_metadata
-            )
-            
-            result = text_workflow.process(workflow_input)
-            
-            assert result.success is True
-            assert result.extracted_content == ""
-            assert result.structured_data["word_count"] == 0
-            assert result.structured_data["char_count"] == 0
-            assert len(result.embeddings) == 0
-        finally:
-            os.unlink(temp_file_path)
+        assert result.success is True
+        assert result.extracted_content == content
+        assert result.structured_data["word_count"] == len(content.split())
+        assert result.structured_data["char_count"] == len(content)
+        assert len(result.embeddings) == expected_chunks
 
 
 class TestTextWorkflowMethods:
@@ -197,11 +209,7 @@ class TestTextWorkflowMethods:
         structured_data = text_workflow._extract_structured_data(sample_text_content)
         
         assert isinstance(structured_data, dict)
-        assert "word_count" in structured_data
-        assert "char_count" in structured_data
-        assert "line_count" in structured_data
-        assert "keywords" in structured_data
-        assert "summary" in structured_data
+        assert structured_data.keys() == {"word_count", "char_count", "line_count", "keywords", "summary"}
         
         # Verify data types and reasonable values
         assert isinstance(structured_data["word_count"], int)
@@ -242,6 +250,13 @@ class TestTextWorkflowMethods:
         assert keywords[1] == "test"
         assert keywords[2] == "example"
     
+    def test_extract_keywords_ties_keep_first_occurrence(self, text_workflow):
+        """Test equally frequent keywords keep the order they first appear in"""
+        test_content = " ".join(f"word{chr(97 + i)}" for i in range(12)) + " wordl"
+        keywords = text_workflow._extract_keywords(test_content)
+        
+        assert keywords == ["wordl"] + [f"word{chr(97 + i)}" for i in range(9)]
+    
     def test_generate_summary(self, text_workflow):
         """Test summary generation"""
         short_content = "Short content"
@@ -258,9 +273,9 @@ class TestTextWorkflowMethods:
         exact_summary = text_workflow._generate_summary(exact_content)
         assert exact_summary == exact_content
     
-    def test_generate_embeddings(self, text_workflow, sample_text_content):
+    def test_generate_embeddings(self, sample_embeddings):
         """Test embedding generation"""
-        embeddings = text_workflow._generate_embeddings(sample_text_content)
+        embeddings = sample_embeddings
         
         assert isinstance(embeddings, list)
         assert len(embeddings) > 0
@@ -282,7 +297,7 @@ class TestTextWorkflowMethods:
         # Test long content (multiple chunks)
         long_content = "word " * 200  # Creates content longer than 500 characters
         long_embeddings = text_workflow._generate_embeddings(long_content)
-        expected_chunks = len(long_content) // 500 + (1 if len(long_content) % 500 > 0 else 0)
+        expected_chunks = -(-len(long_content) // 500)  # ceil division
         assert len(long_embeddings) == expected_chunks
         
         # Test empty content
@@ -293,57 +308,6 @@ class TestTextWorkflowMethods:
 class TestTextWorkflowEdgeCases:
     """Test edge cases and error conditions"""
     
-    def test_unicode_content(self, text_workflow, mock_file_metadata):
-        """Test processing with unicode content"""
-        unicode_content = "Unicode test: café, naïve, résumé, 中文, العربية, 🎉"
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as f:
-            f.write(unicode_content)
-            temp_file_path = f.name
-        
-        try:
-            workflow_input = WorkflowInput(
-                file_id="test_unicode",
-                file_path=temp_file_path,
-                filename="unicode.txt",
-                mime_type="text/plain",
-                file_metadata=mock_file_metadata
-            )
-            
-            result = text_workflow.process(workflow_input)
-            
-            assert result.success is True
-            assert unicode_content in result.extracted_content
-            assert result.structured_data["char_count"] > 0
-        finally:
-            os.unlink(temp_file_path)
-    
-    def test_large_content_processing(self, text_workflow, mock_file_metadata):
-        """Test processing with large content"""
-        large_content = "This is a test sentence. " * 1000  # ~25KB content
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-            f.write(large_content)
-            temp_file_path = f.name
-        
-        try:
-            workflow_input = WorkflowInput(
-                file_id="test_large",
-                file_path=temp_file_path,
-                filename="large.txt",
-                mime_type="text/plain",
-                file_metadata=mock_file_metadata
-            )
-            
-            result = text_workflow.process(workflow_input)
-            
-            assert result.success is True
-            assert len(result.extracted_content) > 20000
-            assert len(result.embeddings) > 1  # Should create multiple chunks
-            assert result.structured_data["word_count"] > 1000
-        finally:
-            os.unlink(temp_file_path)
-    
     def test_special_characters_content(self, text_workflow):
         """Test content with special characters"""
         special_content = "Special chars: @#$%^&*()_+-={}[]|\\:;\"'<>,.?/~`"